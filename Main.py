@@ -6,8 +6,10 @@ from matplotlib.backends.backend_tkagg import (
     FigureCanvasTkAgg, NavigationToolbar2Tk
 )
 import gui_setup.computations as computations
+import gui_setup.instrumentation as instrumentation
 import tkinter.messagebox as messagebox
 import tkinter as tk
+from tkinter import filedialog, simpledialog
 from tkinter import ttk, StringVar, E, W
 
 pad = 5
@@ -18,7 +20,9 @@ def _update_graph_view():
     print("Updating graph view...")
 
     # Validate ALL inputs
-    if not data_manager.validate_all_inputs():
+    with instrumentation.span("validate_inputs"):
+        valid = data_manager.validate_all_inputs()
+    if not valid:
         print("Input validation failed. Graph update stopped.")
         # Optional: Clear graph or show validation error on graph
         # canvas = data_manager.get_graph_canvas()
@@ -32,10 +36,12 @@ def _update_graph_view():
 
     # Gather inputs & Update Tuning
     try:
-        params = data_manager.gather_all_inputs()
+        with instrumentation.span("gather_inputs"):
+            params = data_manager.gather_all_inputs()
         # Update Port Tuning display using calculated fb
-        calculated_fb = computations.port_tuning_calculation(params)
-        data_manager.set_port_tuning_output(calculated_fb)
+        with instrumentation.span("port_tuning"):
+            calculated_fb = computations.port_tuning_calculation(params)
+            data_manager.set_port_tuning_output(calculated_fb)
         print(f"Calculated Port Tuning (fb): {calculated_fb:.2f} Hz")
 
     except ValueError as e: # Catch specific conversion errors
@@ -50,39 +56,193 @@ def _update_graph_view():
         data_manager.set_port_tuning_output("Error")
         return
 
-    # Get graph settings
-    start_freq = data_manager.get_start_freq()
-    stop_freq = data_manager.get_stop_freq()
-    graph_step = data_manager.get_graph_step()
-    canvas = data_manager.get_graph_canvas()
-    graph_type = data_manager.get_selected_graph_type()
+    # Plot (the sweep runs in the background; the graph redraws when it's done)
+    with instrumentation.span("request_graph_update"):
+        data_manager.request_graph_update(params, on_error=_on_plot_error)
+    print("------------------------------------------")
 
-    # Plot
+def _on_plot_error(e):
+    # Called on the Tk thread when a sweep or redraw fails.
+    if isinstance(e, computations.SweepCancelled):
+        return
+    print(f"Error plotting selected data: {e}")
+    messagebox.showerror("Plotting Error", f"An error occurred during plotting: {e}")
+    # Optionally clear the graph or show an error message on it
+    canvas = data_manager.get_graph_canvas()
     if canvas:
-        try:
-            computations.plot_selected_data(canvas, params, start_freq, stop_freq, graph_type, step=graph_step)
-        except Exception as e:
-            print(f"Error plotting selected data: {e}")
-            messagebox.showerror("Plotting Error", f"An error occurred during plotting: {e}")
-            # Optionally clear the graph or show an error message on it
-            fig = canvas.figure
-            fig.clear()
-            ax = fig.add_subplot(111)
-            ax.text(0.5, 0.5, 'Error plotting graph', ha='center', va='center', color='red')
-            canvas.draw()
+        fig = canvas.figure
+        fig.clear()
+        ax = fig.add_subplot(111)
+        ax.text(0.5, 0.5, 'Error plotting graph', ha='center', va='center', color='red')
+        canvas.draw()
+
+def _on_busy_change(busy):
+    # Shows the busy indicator while a sweep is running in the background.
+    if busy:
+        busy_bar.pack(side="left", padx=(pad*2, 0))
+        busy_bar.start(10)
+        mainWindow.window.configure(cursor="watch")
     else:
-        print("Error: Graph canvas not found.")
-
-    print("------------------------------------------")
+        busy_bar.stop()
+        busy_bar.pack_forget()
+        mainWindow.window.configure(cursor="")
 
 def _on_graph_select(event=None):
     # Called when the graph selection combobox value changes.
-    _update_graph_view()
+    # Every metric comes out of the same sweep, so redraw from the last one if the inputs and
+    # graph settings are still the ones it was computed from; otherwise run a full update
+    # (the sweep cache makes that instant when only the drawing is out of date).
+    canvas = data_manager.get_graph_canvas()
+    results = getattr(canvas, 'sweep_results', None)
+    current = False
+    if results is not None and data_manager.validate_all_inputs(show_errors=False):
+        try:
+            current = data_manager.is_graph_current(data_manager.gather_all_inputs())
+        except Exception as e:
+            print(f"Could not read the inputs: {e}")
+    if not current:
+        _update_graph_view()
+        return
+
+    try:
+        computations.draw_sweep_results(canvas, results, data_manager.get_selected_graph_type(),
+                                        getattr(canvas, 'design_labels', None),
+                                        getattr(canvas, 'tolerance_results', None))
+    except Exception as e:
+        print(f"Error redrawing graph: {e}")
+        _update_graph_view()
 
 def _on_update_graph_clicked():
     # Called when the "Update Graph" button is clicked.
     _update_graph_view()
 
+def _on_live_toggle():
+    # Called when the "Live Update" checkbox changes.
+    live_updater.set_enabled(live_update_var.get())
+    if live_update_var.get():
+        _live_refresh(set(gui_setup.live_update.TUNING_FIELDS))
+
+def _live_refresh(changed):
+    # Called by the LiveUpdater once edits have settled. Invalid input is skipped quietly
+    # (the red borders already show it) and only the affected results are recomputed:
+    # fb only when a box/port field changed, and the sweep cache takes care of range-only
+    # and drive-level-only edits.
+    if not data_manager.validate_all_inputs(show_errors=False):
+        return
+    try:
+        params = data_manager.gather_all_inputs()
+    except Exception as e:
+        print(f"Live update skipped: {e}")
+        return
+
+    if not changed.isdisjoint(gui_setup.live_update.TUNING_FIELDS):
+        data_manager.set_port_tuning_output(computations.port_tuning_calculation(params))
+    data_manager.request_graph_update(params, on_error=_on_plot_error)
+
+def _on_driver_library_clicked():
+    # Opens the driver library window (the library file is created on first use)
+    global driver_browser
+    if driver_browser is None:
+        try:
+            library = gui_setup.driver_library.DriverLibrary()
+        except Exception as e:
+            messagebox.showerror("Driver Library", f"Could not open the driver library: {e}")
+            return
+        driver_browser = gui_setup.driver_browser.DriverBrowser(mainWindow.window, library,
+                                                                on_load=_on_driver_loaded)
+    driver_browser.show()
+
+def _on_sensitivity_clicked():
+    # Shows how strongly fb, peak excursion and peak port velocity depend on every input,
+    # over the graph's frequency range
+    global sensitivity_window
+    if not data_manager.validate_all_inputs():
+        return
+    try:
+        params = data_manager.gather_all_inputs()
+        report = gui_setup.sensitivity.sensitivity_report(
+            params, data_manager.get_graph_frequencies(max_points=SENSITIVITY_MAX_POINTS))
+    except Exception as e:
+        messagebox.showerror("Sensitivity", f"Could not compute the sensitivity: {e}")
+        return
+    if sensitivity_window is None:
+        sensitivity_window = gui_setup.sensitivity_window.SensitivityWindow(mainWindow.window)
+    sensitivity_window.show(report)
+
+def _on_driver_loaded():
+    # A driver was loaded from the library; refresh the graph if Live Update is on
+    if live_update_var.get():
+        _live_refresh(set())
+
+def _on_export_clicked():
+    # Writes the current sweep (every metric) to a CSV or JSON-lines file in the background.
+    # Rows are streamed to the file as they are computed, so long sweeps never fill memory.
+    if not data_manager.validate_all_inputs():
+        return
+    try:
+        params = data_manager.gather_all_inputs()
+    except Exception as e:
+        messagebox.showerror("Input Error", f"Could not process input values: {e}")
+        return
+
+    path = filedialog.asksaveasfilename(title="Export Sweep Data", defaultextension=".csv",
+                                        filetypes=[("CSV files", "*.csv"), ("JSON lines", "*.jsonl")])
+    if not path:
+        return
+    start_freq = data_manager.get_start_freq()
+    stop_freq = data_manager.get_stop_freq()
+    if data_manager.get_adaptive_sweep():
+        job, args = _export_adaptive_sweep, (path, params, start_freq, stop_freq)
+    else:
+        job, args = gui_setup.export.export_text, (path, params, start_freq, stop_freq, data_manager.get_graph_step())
+
+    def on_done(num_rows):
+        messagebox.showinfo("Export", f"Wrote {num_rows} rows to {path}.")
+
+    def on_error(e):
+        messagebox.showerror("Export Error", f"Could not export the sweep: {e}")
+
+    export_worker.submit(job, args, on_done=on_done, on_error=on_error)
+
+def _export_adaptive_sweep(path, params, start_freq, stop_freq, cancel_event=None):
+    # Export job for the adaptive grid (already small, so it is computed in one go)
+    results = computations.get_adaptive_sweep_results(params, start_freq, stop_freq, cancel_event=cancel_event)
+    return gui_setup.export.export_result_text(path, results)
+
+def _on_export_busy_change(busy):
+    # Only one export at a time: the button is disabled while one is being written
+    export_button.configure(state=tk.DISABLED if busy else tk.NORMAL)
+
+def _on_save_design_clicked():
+    # Saves the current inputs under a name; saved designs are overlaid on every graph
+    if not data_manager.validate_all_inputs():
+        return
+    try:
+        params = data_manager.gather_all_inputs()
+    except Exception as e:
+        messagebox.showerror("Input Error", f"Could not process input values: {e}")
+        return
+    name = simpledialog.askstring("Save Design", "Design name:",
+                                  initialvalue=f"Design {len(data_manager.get_saved_designs()) + 1}")
+    if not name:
+        return
+    data_manager.save_design(name.strip(), params)
+    _on_saved_designs_changed()
+
+def _on_clear_designs_clicked():
+    data_manager.clear_saved_designs()
+    _on_saved_designs_changed()
+
+def _on_saved_designs_changed():
+    names = [name for name, _ in data_manager.get_saved_designs()]
+    overlay_label.configure(text=", ".join(names) if names else "No saved designs")
+    _live_refresh(set())
+
+def _on_tolerance_toggle():
+    # With Live Update on, the checkbox's own trace already schedules the redraw
+    if not live_update_var.get():
+        _live_refresh(set())
+
 def _on_vc_type_change(*args):
     vc_type = vc_type_var.get()
     if vc_type == "Dual VC":
@@ -159,11 +319,64 @@ graph_step.item_setup(graph_range_frame, pad, txtfield_size, "Hz", use_btn=False
 graph_step.insert_default_txtfield(".5")
 data_manager.register_item("graph_step", graph_step)
 
+# Adaptive sweep: ignores the step and refines the grid around the resonances instead
+adaptive_sweep_var = tk.BooleanVar(value=False)
+adaptive_sweep_check = ttk.Checkbutton(graph_range_frame, text="Adaptive", variable=adaptive_sweep_var)
+adaptive_sweep_check.grid(column=6, row=0, padx=pad, sticky="w")
+data_manager.register_item("adaptive_sweep", adaptive_sweep_var)
+
 
 # Update Button (Right Side)
 update_graph_button = ttk.Button(graph_controls_frame, text="Update Graph", command=_on_update_graph_clicked)
 update_graph_button.pack(side="left", padx=(pad*2, 0))
 
+# Live Update toggle: refreshes fb and the graph automatically after edits settle
+live_update_var = tk.BooleanVar(value=False)
+live_update_check = ttk.Checkbutton(graph_controls_frame, text="Live Update", variable=live_update_var,
+                                    command=_on_live_toggle)
+live_update_check.pack(side="left", padx=(pad*2, 0))
+live_updater = gui_setup.live_update.LiveUpdater(mainWindow.window, _live_refresh,
+                                                 delay_ms=gui_setup.live_update.DEFAULT_DELAY_MS)
+
+# Export the sweep behind the graph (every metric) to CSV / JSON lines
+export_button = ttk.Button(graph_controls_frame, text="Export Data...", command=_on_export_clicked)
+export_button.pack(side="left", padx=(pad*2, 0))
+
+# Busy indicator (only shown while a sweep is running)
+busy_bar = ttk.Progressbar(graph_controls_frame, mode='indeterminate', length=80)
+
+# Background worker for sweeps so the window never freezes
+sweep_worker = gui_setup.sweep_worker.SweepWorker(mainWindow.window, on_busy_change=_on_busy_change)
+data_manager.register_item("sweep_worker", sweep_worker)
+# Exports get their own worker so a graph update never cancels one
+export_worker = gui_setup.sweep_worker.SweepWorker(mainWindow.window, on_busy_change=_on_export_busy_change)
+
+
+# Design overlay controls (second row): saved designs are drawn behind the current one
+overlay_frame = ttk.Frame(graph_frame)
+overlay_frame.pack(side="top", fill="x", padx=pad, pady=(pad, 0))
+save_design_button = ttk.Button(overlay_frame, text="Save Design...", command=_on_save_design_clicked)
+save_design_button.pack(side="left")
+clear_designs_button = ttk.Button(overlay_frame, text="Clear Saved", command=_on_clear_designs_clicked)
+clear_designs_button.pack(side="left", padx=(pad, 0))
+overlay_label = ttk.Label(overlay_frame, text="No saved designs")
+overlay_label.pack(side="left", padx=(pad*2, 0))
+
+# Tolerance analysis: shades the 5-95% band of Monte Carlo runs with Cms, Mms, Bl and Re
+# spread by +/- the given percentage (right side of the second row)
+tolerance_percent_label = ttk.Label(overlay_frame, text="%")
+tolerance_percent_label.pack(side="right")
+tolerance_percent_var = tk.StringVar(value=f"{data_manager.DEFAULT_TOLERANCE_PERCENT:g}")
+tolerance_percent_spin = ttk.Spinbox(overlay_frame, from_=1, to=50, increment=1, width=4,
+                                     textvariable=tolerance_percent_var)
+tolerance_percent_spin.pack(side="right")
+data_manager.register_item("tolerance_percent", tolerance_percent_var)
+tolerance_analysis_var = tk.BooleanVar(value=False)
+tolerance_analysis_check = ttk.Checkbutton(overlay_frame, text="Tolerance ±", variable=tolerance_analysis_var,
+                                           command=_on_tolerance_toggle)
+tolerance_analysis_check.pack(side="right")
+data_manager.register_item("tolerance_analysis", tolerance_analysis_var)
+
 
 # --- Building Graph Area (Below Controls) ---
 graph_area_frame = ttk.Frame(graph_frame)
@@ -305,6 +518,19 @@ submit.btn_setup(button_frame, pad)
 loadTest = gui_setup.buttons.Btn(1, 0, "Load Test")
 loadTest.btn_setup(button_frame, pad)
 
+driver_browser = None
+driver_library_button = ttk.Button(button_frame, text="Driver Library", command=_on_driver_library_clicked)
+driver_library_button.grid(column=2, row=0, padx=pad, pady=pad)
+
+# Most frequencies the sensitivity peaks are searched over
+SENSITIVITY_MAX_POINTS = 20000
+sensitivity_window = None
+sensitivity_button = ttk.Button(button_frame, text="Sensitivity...", command=_on_sensitivity_clicked)
+sensitivity_button.grid(column=3, row=0, padx=pad, pady=pad)
+
+# Every input edit goes to the live updater (it ignores them unless Live Update is on)
+data_manager.bind_edit_listener(live_updater.notify)
+
 # Centering Logic
 # Force tkinter to update and calculate the window's required size
 mainWindow.window.update_idletasks()
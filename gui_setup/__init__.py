@@ -1,7 +1,33 @@
-from . import computations
-from . import gui_data_manager
-from . import gui_items
-from . import window_text
-from . import window_setup
-from . import buttons
-from . import test_data
+# Submodules are imported the first time they are used, so headless code that only needs
+# the model (gui_setup.core) doesn't pay for tkinter/matplotlib at import time.
+import importlib
+
+_submodules = (
+    'core',
+    'inputs',
+    'computations',
+    'gui_data_manager',
+    'gui_items',
+    'window_text',
+    'window_setup',
+    'buttons',
+    'test_data',
+    'batch',
+    'tuning_solver',
+    'port_optimizer',
+    'sweep_worker',
+    'live_update',
+    'benchmark',
+    'instrumentation',
+    'driver_library',
+    'driver_browser',
+    'export',
+    'tolerance',
+    'sensitivity',
+    'sensitivity_window',
+)
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
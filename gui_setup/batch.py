@@ -0,0 +1,265 @@
+# Headless batch evaluation of driver/enclosure designs (no Tk window needed).
+#
+# Usage:
+#   python -m gui_setup.batch designs.csv
+#   python -m gui_setup.batch designs.jsonl -o results.csv --start 10 --stop 200 --step 0.5
+#
+# Each input row/line is one design using the same keys and units as test_data.test_values.
+# Designs are streamed through in fixed-size blocks, so memory use stays constant
+# no matter how many designs are in the file.
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from . import core
+from . import inputs
+
+# Number of designs evaluated together in one broadcast pass
+DEFAULT_BLOCK_SIZE = 256
+
+# Number of designs handed to a worker process at a time
+DEFAULT_CHUNK_SIZE = 4096
+
+# Columns written for every design
+SUMMARY_FIELDS = (
+    'design',
+    'fb_hz',
+    'peak_impedance_ohm',
+    'peak_impedance_freq_hz',
+    'min_impedance_ohm',
+    'min_impedance_freq_hz',
+    'peak_cone_excursion_mm',
+    'peak_cone_excursion_freq_hz',
+    'peak_port_velocity_ms',
+    'peak_port_velocity_freq_hz',
+    'error',
+)
+
+# Key set on a design that could not be read; design_params raises it as the design's error
+READ_ERROR_KEY = '_read_error'
+
+
+def read_designs(file, input_format):
+    # Yields one design dict per CSV row or JSON line
+    # @param file is an open text file
+    # @param input_format is 'csv' or 'jsonl'
+    # A JSON line that isn't a valid object still yields a design, holding only the error
+    # (under READ_ERROR_KEY), so one bad line doesn't stop the batch
+    if input_format == 'csv':
+        for row in csv.DictReader(file):
+            yield row
+    else:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                design = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {READ_ERROR_KEY: f"Line {line_number}: invalid JSON ({e.msg})"}
+                continue
+            if not isinstance(design, dict):
+                yield {READ_ERROR_KEY: f"Line {line_number}: expected a JSON object, got {type(design).__name__}"}
+                continue
+            yield design
+
+
+def design_params(design):
+    # Same as inputs.design_to_params, but also raises ValueError for a design read_designs
+    # could not read
+    if READ_ERROR_KEY in design:
+        raise ValueError(design[READ_ERROR_KEY])
+    return inputs.design_to_params(design)
+
+
+def summarize_designs(params_list, frequencies):
+    # Runs a block of designs over the frequency grid in one broadcast pass.
+    # Returns a list with one dict of summary metrics per design.
+    columns = {key: np.array([params[key] for params in params_list], dtype=float)
+               for key in params_list[0]}
+    result = core.PreparedSystem(columns).evaluate(frequencies)
+
+    metrics = {
+        'impedance': result.magnitude(),
+        'cone_excursion': result.cone_excursion_mm,
+        'port_velocity': result.port_velocity_ms,
+    }
+    # NaN points (invalid designs) should never be picked as a peak
+    cleaned = {name: np.where(np.isnan(values), -np.inf, values) for name, values in metrics.items()}
+    peak = {name: np.argmax(values, axis=1) for name, values in cleaned.items()}
+    min_z = np.argmin(np.where(np.isnan(metrics['impedance']), np.inf, metrics['impedance']), axis=1)
+
+    rows = []
+    for k in range(len(params_list)):
+        rows.append({
+            'fb_hz': result.fb[k],
+            'peak_impedance_ohm': metrics['impedance'][k, peak['impedance'][k]],
+            'peak_impedance_freq_hz': frequencies[peak['impedance'][k]],
+            'min_impedance_ohm': metrics['impedance'][k, min_z[k]],
+            'min_impedance_freq_hz': frequencies[min_z[k]],
+            'peak_cone_excursion_mm': metrics['cone_excursion'][k, peak['cone_excursion'][k]],
+            'peak_cone_excursion_freq_hz': frequencies[peak['cone_excursion'][k]],
+            'peak_port_velocity_ms': metrics['port_velocity'][k, peak['port_velocity'][k]],
+            'peak_port_velocity_freq_hz': frequencies[peak['port_velocity'][k]],
+        })
+    return rows
+
+
+def evaluate_designs(designs, frequencies, block_size=DEFAULT_BLOCK_SIZE, first_index=0):
+    # Yields a summary row for every design, in input order.
+    # Designs without a 'name' are labelled by their position (starting at first_index).
+    # Designs are converted one at a time and evaluated block_size at a time, so memory use
+    # depends on the block size rather than the number of designs.
+    # Designs that can't be converted get a row with only 'design' and 'error' set.
+    block_rows = []
+    block_params = []
+    for index, design in enumerate(designs, first_index):
+        row = {'design': design.get('name') or index}
+        try:
+            params = design_params(design)
+            block_params.append(params)
+        except ValueError as e:
+            row['error'] = str(e)
+        block_rows.append(row)
+
+        if len(block_params) >= block_size:
+            yield from _finish_block(block_rows, block_params, frequencies)
+            block_rows = []
+            block_params = []
+    if block_rows:
+        yield from _finish_block(block_rows, block_params, frequencies)
+
+
+def _finish_block(block_rows, block_params, frequencies):
+    # Fills in the metrics for the valid designs of a block and returns all its rows in order
+    summaries = iter(summarize_designs(block_params, frequencies) if block_params else [])
+    for row in block_rows:
+        if 'error' not in row:
+            row.update(next(summaries))
+    return block_rows
+
+
+def evaluate_designs_parallel(designs, frequencies, block_size=DEFAULT_BLOCK_SIZE,
+                              chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    # Same rows as evaluate_designs, but chunks of chunk_size designs are spread across a
+    # ProcessPoolExecutor. Rows still come out in input order, and only a few chunks per
+    # worker are in flight at once so memory stays bounded for any number of designs.
+    # Runs in-process when there is one worker or the whole batch fits in a single chunk,
+    # since starting processes would cost more than it saves.
+    # @param max_workers is the number of processes (defaults to the number of CPUs)
+    max_workers = max_workers or os.cpu_count() or 1
+    designs = iter(designs)
+    first_chunk = list(itertools.islice(designs, chunk_size))
+    second_chunk = list(itertools.islice(designs, chunk_size))
+
+    if max_workers == 1 or not second_chunk:
+        all_designs = itertools.chain(first_chunk, second_chunk, designs)
+        yield from evaluate_designs(all_designs, frequencies, block_size)
+        return
+
+    chunks = itertools.chain((first_chunk, second_chunk), iter(lambda: list(itertools.islice(designs, chunk_size)), []))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        first_index = 0
+        for chunk in chunks:
+            pending.append(executor.submit(_evaluate_chunk, chunk, frequencies, block_size, first_index))
+            first_index += len(chunk)
+            # Keep a couple of chunks queued per worker, yielding finished ones in order
+            while len(pending) >= max_workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _evaluate_chunk(chunk, frequencies, block_size, first_index):
+    # Worker process entry point: evaluates one chunk of designs and returns its rows
+    return list(evaluate_designs(chunk, frequencies, block_size, first_index))
+
+
+def write_results(rows, file, output_format):
+    # Writes summary rows to an open text file as they arrive
+    if output_format == 'csv':
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS, restval='')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: _format_value(value) for key, value in row.items()})
+    else:
+        for row in rows:
+            file.write(json.dumps({key: _format_value(value) for key, value in row.items()}) + "\n")
+
+
+def _format_value(value):
+    # Converts NumPy scalars to plain Python values for csv/json output
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _guess_format(path, default):
+    # Picks 'csv' or 'jsonl' from a file extension
+    if path and path.lower().endswith('.csv'):
+        return 'csv'
+    if path and path.lower().endswith(('.jsonl', '.json', '.ndjson')):
+        return 'jsonl'
+    return default
+
+
+def build_frequencies(start_freq, stop_freq, step):
+    # Same frequency grid as the Graphs tab
+    num_steps = int((stop_freq - start_freq) / step) + 1
+    return np.linspace(start_freq, stop_freq, num=num_steps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gui_setup.batch",
+        description="Evaluate driver/enclosure designs from a CSV or JSON-lines file.")
+    parser.add_argument("input", help="CSV or JSON-lines file of designs ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout, the default)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Defaults to the input file extension")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), help="Defaults to the output file extension")
+    parser.add_argument("--start", type=float, default=10, help="Start frequency in Hz (default 10)")
+    parser.add_argument("--stop", type=float, default=120, help="Stop frequency in Hz (default 120)")
+    parser.add_argument("--step", type=float, default=0.5, help="Frequency step in Hz (default 0.5)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                        help=f"Designs evaluated per broadcast pass (default {DEFAULT_BLOCK_SIZE})")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Worker processes (default: number of CPUs, 1 runs in-process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Designs sent to a worker at a time (default {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    if args.step <= 0 or args.stop <= args.start or args.start < 0:
+        parser.error("frequency range must satisfy 0 <= start < stop and step > 0")
+    if args.block_size < 1:
+        parser.error("--block-size must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    input_format = args.input_format or _guess_format(args.input, 'csv')
+    output_format = args.output_format or _guess_format(args.output, 'csv')
+    frequencies = build_frequencies(args.start, args.stop, args.step)
+
+    in_file = sys.stdin if args.input == "-" else open(args.input, newline='')
+    out_file = sys.stdout if args.output == "-" else open(args.output, "w", newline='')
+    try:
+        rows = evaluate_designs_parallel(read_designs(in_file, input_format), frequencies, args.block_size,
+                                         args.chunk_size, args.workers)
+        write_results(rows, out_file, output_format)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
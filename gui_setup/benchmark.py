@@ -0,0 +1,267 @@
+# Benchmarks for the computation and plotting hot paths (no Tk window needed).
+#
+# Usage:
+#   python -m gui_setup.benchmark
+#   python -m gui_setup.benchmark -o bench.json --sizes 100 10000 --repeat 5 --only plot_selected_data
+#
+# Every benchmark uses test_data.test_values as the design and runs once per size, where the
+# size is the number of sweep points (or calls, for the per-call benchmarks). The JSON output
+# records the environment with the timings so runs from different releases can be compared.
+import argparse
+import contextlib
+import json
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+from . import core
+from . import inputs
+from . import test_data
+
+DEFAULT_SIZES = (100, 10000, 100000)
+DEFAULT_REPEAT = 3
+
+# Frequency range the sweep benchmarks spread their points over (Hz)
+SWEEP_START = 10
+SWEEP_STOP = 2000
+
+# Graph types drawn by the plot benchmark (one sweep, every metric)
+PLOT_GRAPH_TYPES = ("Impedance", "Cone Excursion (mm)", "Port Velocity (m/s)", "Group Delay (ms)")
+
+
+class _StubItem(object):
+    # Stands in for gui_items.Item so gui_data_manager can be timed without any Tk widgets
+    # @param text is the value shown in the entry
+    # @param unit is the unit combobox value (None for items without a unit widget)
+    def __init__(self, text, unit=None):
+        self.text = text
+        self.value = str(text)
+        self.unit = unit
+        self._unit_widget_type = 'cmb' if unit is not None else None
+
+    def get_txtfield(self):
+        return self.value
+
+    def get_cmb(self):
+        return self.unit
+
+
+def _stub_items(design):
+    # Returns the registered item name -> stub for every input gather_all_inputs() reads
+    items = {}
+    for key in ('re', 'le', 'bl', 'sd', 'cms', 'mms', 'rms', 'vg', 'vb', 'port_area', 'port_length'):
+        name = 'net_volume' if key == 'vb' else key
+        items[name] = _StubItem(design[key], design.get(f"{key}_unit"))
+    items['number_of_ports'] = _StubItem(design.get('number_of_ports', 1))
+    items['end_correction'] = _StubItem('', design.get('end_correction', 'One Flanged End'))
+    return items
+
+
+def _sweep_frequencies(size):
+    return np.linspace(SWEEP_START, SWEEP_STOP, num=size)
+
+
+def _sweep_step(size):
+    # Step that makes get_sweep_results build a grid of (about) size points
+    return (SWEEP_STOP - SWEEP_START) / (size - 1)
+
+
+def bench_port_tuning_calculation(params, size):
+    # size scalar calls, as the GUI makes them
+    def run():
+        for _ in range(size):
+            core.port_tuning_calculation(params)
+    return run
+
+
+def bench_port_tuning_calculation_array(params, size):
+    # One vectorized call over size designs (vb spread over 0.5x-2x)
+    design_params = dict(params, vb=params['vb'] * np.linspace(0.5, 2.0, num=size))
+
+    def run():
+        core.port_tuning_calculation_array(design_params)
+    return run
+
+
+def bench_run_full_analysis_at_frequency(params, size):
+    # The scalar reference model, once per sweep point
+    frequencies = _sweep_frequencies(size).tolist()
+
+    def run():
+        for frequency in frequencies:
+            core.run_full_analysis_at_frequency(frequency, params)
+    return run
+
+
+def bench_run_full_analysis_sweep(params, size):
+    # The vectorized model over the same points
+    frequencies = _sweep_frequencies(size)
+
+    def run():
+        core.run_full_analysis_sweep(frequencies, params)
+    return run
+
+
+def bench_rational_model_evaluate(params, size):
+    # The model compiled to polynomials once, then evaluated over the same points
+    frequencies = _sweep_frequencies(size)
+    model = core.PreparedSystem(params).rational_model()
+
+    def run():
+        model.evaluate(frequencies)
+    return run
+
+
+def bench_plot_selected_data(params, size):
+    # Full uncached sweep plus drawing every graph type on an offscreen Agg canvas
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from . import computations
+
+    canvas = FigureCanvasAgg(Figure(figsize=(6, 4), dpi=100))
+    step = _sweep_step(size)
+
+    def run():
+        core.clear_sweep_cache()
+        for graph_type in PLOT_GRAPH_TYPES:
+            computations.plot_selected_data(canvas, params, SWEEP_START, SWEEP_STOP, graph_type, step)
+    return run
+
+
+def bench_convert_to_si(params, size):
+    # size conversions of one registered (stubbed) item with a unit widget
+    from . import gui_data_manager
+
+    items = _stub_items(test_data.test_values)
+
+    def run():
+        with _registered(gui_data_manager, items):
+            for _ in range(size):
+                gui_data_manager.convert_to_si('cms', 'm/N')
+    return run
+
+
+def bench_gather_all_inputs(params, size):
+    # size full gathers from stubbed widgets
+    from . import gui_data_manager
+
+    items = _stub_items(test_data.test_values)
+
+    def run():
+        with _registered(gui_data_manager, items):
+            for _ in range(size):
+                gui_data_manager.gather_all_inputs()
+    return run
+
+
+class _registered(object):
+    # Context manager that swaps the data manager's registered items for the stubs
+    def __init__(self, data_manager, items):
+        self.data_manager = data_manager
+        self.items = items
+
+    def __enter__(self):
+        self.saved = dict(self.data_manager._gui_items)
+        self.data_manager._gui_items.clear()
+        self.data_manager._gui_items.update(self.items)
+
+    def __exit__(self, *exc_info):
+        self.data_manager._gui_items.clear()
+        self.data_manager._gui_items.update(self.saved)
+
+
+BENCHMARKS = {
+    'port_tuning_calculation': bench_port_tuning_calculation,
+    'port_tuning_calculation_array': bench_port_tuning_calculation_array,
+    'run_full_analysis_at_frequency': bench_run_full_analysis_at_frequency,
+    'run_full_analysis_sweep': bench_run_full_analysis_sweep,
+    'rational_model_evaluate': bench_rational_model_evaluate,
+    'plot_selected_data': bench_plot_selected_data,
+    'convert_to_si': bench_convert_to_si,
+    'gather_all_inputs': bench_gather_all_inputs,
+}
+
+
+def time_call(run, repeat):
+    # Runs run() once to warm up, then repeat more times.
+    # Returns: list of wall times in seconds
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_benchmarks(names=None, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, progress=None):
+    # Runs the named benchmarks (default: all) at every size.
+    # @param progress is an optional callable taking each result dict as it finishes
+    # Returns: dict with the environment and one result per (benchmark, size)
+    import matplotlib
+    matplotlib.use('Agg')
+
+    params = inputs.design_to_params(test_data.test_values)
+    results = []
+    for name in names or BENCHMARKS:
+        for size in sizes:
+            times = time_call(BENCHMARKS[name](params, size), repeat)
+            result = {
+                'name': name,
+                'size': size,
+                'repeat': repeat,
+                'best_s': min(times),
+                'median_s': statistics.median(times),
+                'per_item_us': min(times) / size * 1e6,
+            }
+            results.append(result)
+            if progress:
+                progress(result)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gui_setup.benchmark",
+        description="Time the computation and plotting hot paths and write the results as JSON.")
+    parser.add_argument("-o", "--output", default="-", help="Output JSON file ('-' for stdout, the default)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Sweep sizes / call counts (default 100 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed runs per benchmark and size (default {DEFAULT_REPEAT})")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    args = parser.parse_args(argv)
+
+    if any(size < 2 for size in args.sizes):
+        parser.error("--sizes must be at least 2")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    def progress(result):
+        print(f"{result['name']:<32} {result['size']:>8}  best {result['best_s'] * 1000:10.2f} ms"
+              f"  ({result['per_item_us']:.3f} us/item)", file=sys.stderr)
+
+    # Progress prints from the code under test go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(args.only, args.sizes, args.repeat, progress)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as out_file:
+            json.dump(report, out_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
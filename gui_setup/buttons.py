@@ -57,16 +57,8 @@ class Btn(object):
                 calculated_fb = computations.port_tuning_calculation(params)
                 data_manager.set_port_tuning_output(calculated_fb)
 
-                # Get graph settings
-                start_freq = data_manager.get_start_freq()
-                stop_freq = data_manager.get_stop_freq()
-                graph_step = data_manager.get_graph_step()
-                canvas = data_manager.get_graph_canvas()
-                graph_type = data_manager.get_selected_graph_type()
-
-                # Generate and display the graph
-                if canvas:
-                    computations.plot_selected_data(canvas, params, start_freq, stop_freq, graph_type, step=graph_step)
+                # Generate and display the graph (the sweep runs in the background)
+                data_manager.request_graph_update(params, on_error=self._on_calculation_error)
 
             except Exception as e:
                 # Catch potential errors during calculation/plotting if inputs were *just* valid
@@ -88,6 +80,12 @@ class Btn(object):
             return
 
 
+    def _on_calculation_error(self, e):
+        # Called on the Tk thread if the background sweep or the redraw fails
+        if not isinstance(e, computations.SweepCancelled):
+            messagebox.showerror("Calculation Error", f"An error occurred: {e}")
+
+
 class Combo(object):
     # Combo class takes in two integers and any number of strings to create a tkinter Combobox
     # @param col is the column location for the Combobox (integer)
@@ -1,29 +1,51 @@
-# This new computations file will only be in charge of math functionality
-import math
-import cmath
-import matplotlib.pyplot as plt
+# This computations file is the GUI side of the math functionality.
+# The model itself lives in core.py (NumPy only); this module adds the plotting
+# helpers and re-exports the core functions under their usual names.
 import numpy as np
-
-#conversion constants needed for port tuning calculations
-M2_TO_IN2 = 1550.003
-M2_TO_CM2 = 10000.0
-M3_TO_IN3 = 61023.7
-M3_TO_L = 1000.0
-M_TO_IN = 39.3701
-M_TO_CM = 100.0
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from . import instrumentation
+from . import tolerance
+from .core import (
+    M2_TO_IN2, M2_TO_CM2, M3_TO_IN3, M3_TO_L, M_TO_IN, M_TO_CM,
+    calculate_port_diameter,
+    port_tuning_calculation,
+    port_tuning_calculation_array,
+    run_full_analysis_at_frequency,
+    calculate_ccab,
+    calculate_ral,
+    calculate_lmap,
+    calculate_pd_i_u,
+    calculate_port_velocity,
+    calculate_cone_excursion,
+    SweepResult,
+    PreparedSystem,
+    RationalModel,
+    run_full_analysis_sweep,
+    calculate_group_delay_ms,
+    get_sweep_results,
+    adaptive_sweep,
+    get_adaptive_sweep_results,
+    stack_designs,
+    params_key,
+    clear_sweep_cache,
+    SweepCancelled,
+)
 
 class CursorAnnotation(object):
     # Creates an interactive data cursor that "snaps" to the plot line
     # and displays the (x, y) coordinates.
+    # Hovering only redraws the annotation: the rest of the figure is saved after every full
+    # draw and blitted back underneath it, so the cost doesn't grow with the number of points.
 
-    def __init__(self, ax, line, formatter):
+    def __init__(self, ax, line, formatter, data=None):
         self.ax = ax
-        self.line = line
-        self.formatter = formatter
-        self.data_x, self.data_y = line.get_xdata(), line.get_ydata()
         self.canvas = ax.figure.canvas
+        self.background = None
 
-        # Create the annotation object, but keep it hidden
+        # Create the annotation object, but keep it hidden.
+        # It is animated so full redraws leave it out of the saved background.
         self.annotation = ax.annotate(
             text="",
             xy=(0, 0),
@@ -31,24 +53,57 @@ class CursorAnnotation(object):
             textcoords="offset points",
             bbox=dict(boxstyle="round,pad=0.4", fc="white", alpha=0.7),
             arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=0.1"),
-            visible=False
+            visible=False,
+            animated=True
         )
 
-        # Connect the mouse-move event to our update function
+        # Connect the mouse-move event to our update function, and refresh the saved
+        # background whenever the figure is fully redrawn (resize, zoom, new data)
         self.cid = self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
 
-    def on_mouse_move(self, event):
-        # Callback for the mouse-move event
-        if not event.inaxes:
-            # Mouse is outside the plot area
-            if self.annotation.get_visible():
-                self.annotation.set_visible(False)
-                self.canvas.draw_idle()
+        self.set_line(line, formatter, data)
+
+    def set_line(self, line, formatter, data=None):
+        # Points the cursor at a (new or updated) line and hides the annotation.
+        # @param data is an optional (x, y) pair with the full-resolution points, for lines
+        #  that only hold a decimated copy
+        self.line = line
+        self.formatter = formatter
+        if data is None:
+            data = (line.get_xdata(), line.get_ydata())
+        self.data_x, self.data_y = np.asarray(data[0]), np.asarray(data[1])
+        self.index = None
+        self.annotation.set_visible(False)
+
+        # Sweeps use a uniform frequency grid, so the closest point can be found arithmetically
+        # instead of searching. Any other x data falls back to np.searchsorted.
+        self.x0, self.dx = None, None
+        if len(self.data_x) >= 2:
+            spacing = np.diff(self.data_x)
+            if spacing[0] > 0 and np.allclose(spacing, spacing[0], rtol=1e-9, atol=0):
+                self.x0 = self.data_x[0]
+                self.dx = (self.data_x[-1] - self.data_x[0]) / (len(self.data_x) - 1)
+
+    def disconnect(self):
+        # Removes the canvas callbacks (call before dropping the cursor)
+        self.canvas.mpl_disconnect(self.cid)
+        self.canvas.mpl_disconnect(self.draw_cid)
+
+    def on_draw(self, event):
+        # Callback for full redraws: save the clean figure and put the annotation back on top
+        if not getattr(self.canvas, 'supports_blit', False):
             return
+        self.background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        if self.annotation.get_visible():
+            self.ax.draw_artist(self.annotation)
 
-        x, y = event.xdata, event.ydata
+    def closest_index(self, x):
+        # Returns the index of the data point closest to x
+        last = len(self.data_x) - 1
+        if self.dx is not None:
+            return min(max(int(round((x - self.x0) / self.dx)), 0), last)
 
-        # Find the index of the closest data point on the line
         index = np.searchsorted(self.data_x, x)
 
         # Handle edge cases (cursor left of first point or right of last point)
@@ -63,6 +118,23 @@ class CursorAnnotation(object):
         # Find which of the two points is closer to the cursor
         if abs(x - x_left) < abs(x - x_right):
             index = index - 1
+        return index
+
+    def on_mouse_move(self, event):
+        # Callback for the mouse-move event
+        if event.inaxes is not self.ax or len(self.data_x) == 0:
+            # Mouse is outside the plot area
+            if self.annotation.get_visible():
+                self.annotation.set_visible(False)
+                self.index = None
+                self.redraw()
+            return
+
+        # Find the index of the closest data point on the line
+        index = self.closest_index(event.xdata)
+        if index == self.index and self.annotation.get_visible():
+            return  # still snapped to the same point, nothing to redraw
+        self.index = index
 
         # Get the actual (x, y) of the data point
         point_x = self.data_x[index]
@@ -76,336 +148,315 @@ class CursorAnnotation(object):
         if not self.annotation.get_visible():
             self.annotation.set_visible(True)
 
-        self.canvas.draw_idle()
-
-def calculate_port_diameter(value):
-    # Converts port area in cm^2 to diameter in cm for DIY audio equation
-    return 2 * math.sqrt(value / math.pi)
-
-
-def port_tuning_calculation(params):
-    # Calculates port tuning freq (fb) using averaged formula.
-    # Extracts SI values from params dict and converts internally.
-
-    # Get SI values from params
-    # Sd is already in m^2, Vb is already in m^3
-    port_area_m2 = params.get('port_area_m2', 0)  # Use Sd for port area in m^2
-    net_volume_m3 = params.get('vb', 0)  # Use Vb for net volume in m^3
-    port_length_m = params.get('port_length_m', 0)  # Get Port Length in meters
-    number_of_ports = params.get('number_of_ports', 1)
-    end_correction_factor = params.get('end_correction', 0.732)  # Get factor
-
-    # --- Internal Conversions ---
-    port_area_in2 = (port_area_m2 * M2_TO_IN2) * number_of_ports  # Total area in^2
-    port_area_cm2 = (port_area_m2 * M2_TO_CM2)  # Single port area cm^2 for diameter calc
-    net_volume_in3 = net_volume_m3 * M3_TO_IN3
-    net_volume_l = net_volume_m3 * M3_TO_L
-    port_length_in = port_length_m * M_TO_IN
-    port_length_cm = port_length_m * M_TO_CM
-
-    # Check for zero values to prevent division errors
-    if net_volume_m3 <= 0 or port_area_m2 <= 0 or number_of_ports <= 0:
-        return 0  # Or raise an error
-
-    port_diameter_cm = calculate_port_diameter(port_area_cm2)
-    if port_diameter_cm <= 0:
-        return 0  # Avoid math domain error later
-
-    # JL Audio equation
-    jl_denominator = (net_volume_in3 * (port_length_in + end_correction_factor * math.sqrt(port_area_in2 / number_of_ports))) # Use single port area for sqrt part
-    if jl_denominator <= 0:
-        port_tuning1 = 0
-    else:
-        port_tuning1 = 0.159 * math.sqrt(port_area_in2 * 1.84E8 / jl_denominator)
-
-
-    # DIY Audio equation
-    diy_denominator = (math.sqrt(net_volume_l) * math.sqrt(port_length_cm + end_correction_factor * port_diameter_cm))
-    if diy_denominator == 0:
-         port_tuning2 = 0
-    else:
-        port_tuning2 = (153.501 * port_diameter_cm * math.sqrt(number_of_ports)) / diy_denominator
-
-
-    # Return average, handle potential NaN if one formula failed
-    if math.isnan(port_tuning1) or math.isnan(port_tuning2):
-        # Decide how to handle: return 0, return the valid one, or raise error
-        if not math.isnan(port_tuning1): return port_tuning1
-        if not math.isnan(port_tuning2): return port_tuning2
-        return 0 # Fallback if both fail
-    else:
-        return (port_tuning1 + port_tuning2) / 2
-
-def run_full_analysis_at_frequency(frequency, params):
-   # This is the main controller function for this file.
-   # As the name suggests, it will run all computations for a given frequency
-   # Args:
-    # frequency (float): The frequency to analyze (given in Hz)
-    # params (dict): A dictionary of all driver/enclosure parameters
-   # Returns:  Dictionary of all final calculations
-
-    # ----
-    # Calculate intermediate values
-    # ----
-
-    # w represents angular tuning frequency. Note that this is distinctly different than wb.
-    # This value is used during analysis and will vary based on the frequency being calculated.
-    w = 2.0 * math.pi * frequency
-
-    # s represents the common abbreviation for j*w where j in an imaginary number.
-    s = 1j * w
-
-    # First, calculate fb using your averaged formula
-    fb = port_tuning_calculation(params)
-
-    # Now, use fb to calculate the rest of the physics components
-
-    # wb represents angular box tuning frequency as 2*PI*port_tuning
-    wb = 2.0 * math.pi * fb
-
-    # ccab represents the acoustic compliance of the enclosure volume
-    ccab = calculate_ccab(params['vb'], params['p0'], params['c'])
-
-    # ral represents the acoustic resistance modeling air leak
-    ral = calculate_ral(params['ql'], wb, ccab)
-
-    # lmap represents angular frequency as 2*PI*frequency
-    lmap = calculate_lmap(wb, ccab)
-
-    # ----
-    # Run the core physics simulation
-    # ----
-
-    core_results = calculate_pd_i_u(s, params, ccab, ral, lmap, z_mech=None)
-
-    # ----
-    # Use core results to find final values
-    # ----
-
-    num_ports = params.get('number_of_ports', 1)
-    single_port_area_m2 = params.get('port_area_m2', 0) / num_ports if num_ports > 0 else 0
-    port_vel = calculate_port_velocity(core_results, single_port_area_m2, s, lmap)
-    cone_exc = calculate_cone_excursion(core_results, w)
-    zin_phase_radians = cmath.phase(core_results['zin'])  # Phase in radians
-
-    # ----
-    # Return all results as dictionary of values
-    # ----
-
-    return {
-        "frequency": frequency,
-        "zin": core_results['zin'],
-        "zin_phase_rad": zin_phase_radians,
-        "i": core_results['i'],
-        "u": core_results['u'],
-        "pd": core_results['pd'],
-        "fb": fb,
-        "port_velocity_ms": abs(port_vel),
-        "cone_excursion_mm": abs(cone_exc) * 1000,
-        # Add other results as needed
-    }
-
-# ----
-# Pure Math Functions
-# ---
-
-def calculate_ccab(vb, p0, c):
-    # Calculates acoustic compliance of the enclosure
-    return vb / (p0 * c ** 2)
-
-
-def calculate_ral(ql, wb, ccab):
-    # Calculates acoustic resistance (losses)
-    return ql / (wb * ccab)
-
-
-def calculate_lmap(wb, ccab):
-    # Calculates acoustic mass (inductance) of the port
-    return 1 / (wb ** 2 * ccab)
-
-
-def calculate_pd_i_u(s, params, ccab, ral, lmap, z_mech=None):
-    # Core physics simulation
-    # Accepts all parameters as arguments.
+        self.redraw()
 
-    # Get values from the params dict
-    re = params['re']
-    le = params['le']
-    rms = params['rms']
-    mms = params['mms']
-    cms = params['cms']
-    bl = params['bl']
-    sd = params['sd']
-    vg = params['vg']
-
-    # Calculate mechanical impedance
-    if z_mech is None:
-        try:
-            z_mech = rms + s * mms + (1 / (s * cms) if s else float('inf'))
-        except ZeroDivisionError:
-            z_mech = float('inf')
-
-    # Calculate electrical impedance
-    z_elec = re + s * le
-    try:
-        zb_inv = (s * ccab if ccab != float('inf') else 0) + \
-                 (1 / ral if ral != float('inf') and ral != 0 else 0) + \
-                 (1 / (s * lmap) if s and lmap != float('inf') else 0)
-        zb = 1 / zb_inv if zb_inv else float('inf')
-    except ZeroDivisionError:
-        zb = float('inf')
-
-    # Combine impedances
-    z_mech_total = z_mech + sd ** 2 * zb if z_mech != float('inf') and zb != float('inf') else float('inf')
-    zin = z_elec + (bl ** 2 / z_mech_total) if z_mech_total else z_elec # Avoid division by zero
-
-    # ----
-    # Solve for primary unknowns
-    # ----
-
-    # i represents the loop mesh current of the amplifier/driver electrical portions of the circuit model
-    i = vg / zin if zin else 0
-
-    # pd represents the voltage across loop mesh of the driver acoustical and box portion of the circuit model
-    pd = i * (bl * sd * zb) / z_mech_total if z_mech_total else 0
-
-    # u represents the loop mesh current of the driver mechanical portions of the circuit model
-    u = (bl * i - sd * pd) / z_mech if z_mech else 0
-
-    return {
-        "zin": zin,
-        "i": i,
-        "u": u,
-        "pd": pd,
-        "zb": zb
-    }
-
-
-def calculate_port_velocity(core_results, single_port_area_m2, s, lmap):
-    # Calculates port velocity from core results
-
-    pd = core_results.get('pd', 0)
-
-    if not s or lmap == float('inf') or single_port_area_m2 <= 0:
-        return 0
-
-    # Calculates the impedance of the port
-    zlmap = s * lmap
-
-    # Calculates RMS port velocity
-    ilmap = pd / zlmap
-
-    if not zlmap: return 0
-
-    # Returns the peak velocity (RMS * sqrt(s))/area
-    return (ilmap * math.sqrt(2)) / single_port_area_m2
+    def redraw(self):
+        # Blits the annotation over the saved background, or falls back to a full redraw
+        # on backends without blitting (or before the first draw)
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        if self.annotation.get_visible():
+            self.ax.draw_artist(self.annotation)
+        self.canvas.blit(self.ax.figure.bbox)
+
+def decimate_min_max(x, y, x_min, x_max, num_buckets):
+    # Thins a long line (x sorted ascending) down to what can be seen at num_buckets pixels.
+    # Only the points between x_min and x_max (plus one either side, so the line still runs
+    # off the edges) are used, and each of num_buckets equal runs of points keeps just its
+    # lowest and highest point, in their original order. Peaks and dips survive exactly.
+    # Returns: (x, y); lines that are already short enough come back as plain views
+    start = max(np.searchsorted(x, x_min, side='left') - 1, 0)
+    stop = min(np.searchsorted(x, x_max, side='right') + 1, len(x))
+    x, y = x[start:stop], y[start:stop]
+    bucket_size = -(-len(x) // max(int(num_buckets), 1))  # ceiling division
+    if bucket_size <= 2:
+        return x, y
+
+    # One row per bucket; the last row is padded with NaN, which is never picked over a real point
+    num_rows = -(-len(x) // bucket_size)
+    buckets = np.full(num_rows * bucket_size, np.nan)
+    buckets[:len(y)] = y
+    buckets = buckets.reshape(num_rows, bucket_size)
+    missing = np.isnan(buckets)
+    offsets = np.arange(num_rows) * bucket_size
+    keep = np.concatenate([
+        offsets + np.where(missing, np.inf, buckets).argmin(axis=1),
+        offsets + np.where(missing, -np.inf, buckets).argmax(axis=1),
+        [0, len(x) - 1],
+    ])
+    keep = np.unique(np.minimum(keep, len(x) - 1))
+    return x[keep], y[keep]
+
+
+class GraphView(object):
+    # Keeps one Axes, one Line2D per graph type and one cursor alive between updates.
+    # New data goes in with set_data; the axis limits are only recomputed when the frequency
+    # range or the data range changes, and the layout only when the window is resized or the
+    # graph type (and so the labels) changes. Creating a new view clears the figure.
+    # The line only ever holds a min/max decimated copy of the sweep sized to the axes width;
+    # it is rebuilt from the full data whenever the x limits change (toolbar zoom/pan) or the
+    # window is resized, so drawing cost follows the pixel count, not the sweep length.
+    # Multi-design sweeps draw the first design on that line and every other design (saved
+    # designs being compared) behind it as one LineCollection, decimated the same way.
+    # A tolerance band (percentile range of a Monte Carlo run) can be shaded behind it all.
+    # @param canvas is the FigureCanvas the view draws on
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.figure = canvas.figure
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Frequency (Hz)")
+        self.ax.grid(True, which="both", ls="--", c='0.7')
+        self.lines = {}
+        self.cursor = None
+        self.graph_type = None
+        self.x_range = None
+        self.y_range = None
+        self.needs_layout = True
+        self.line = None
+        self.full_x, self.full_y = None, None
+        # Overlaid designs: one collection for all of them, so 20 cost about the same as one
+        self.overlay = LineCollection([], linewidths=1.0, alpha=0.8, zorder=1.5)
+        self.ax.add_collection(self.overlay, autolim=False)
+        self.overlay_y = None
+        # Tolerance band: shaded percentile range plus its median
+        self.band = None
+        self.band_median, = self.ax.plot([], [], color='C0', ls='--', lw=1.0, zorder=1.5)
+        self.legend_key = None
+        self.resize_cid = canvas.mpl_connect('resize_event', self.on_resize)
+        self.xlim_cid = self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def is_attached(self):
+        # False once something else has cleared the figure (e.g. the error message)
+        return self.ax.figure is self.figure and self.ax in self.figure.axes
+
+    def disconnect(self):
+        # Removes every canvas callback owned by the view
+        self.canvas.mpl_disconnect(self.resize_cid)
+        self.ax.callbacks.disconnect(self.xlim_cid)
+        if self.cursor is not None:
+            self.cursor.disconnect()
+
+    def on_resize(self, event):
+        # The canvas redraws itself after a resize; just fix the layout and line density first
+        with instrumentation.span("draw.tight_layout"):
+            self.figure.tight_layout()
+        self.redecimate()
+
+    def on_xlim_changed(self, ax):
+        self.redecimate()
+
+    def redecimate(self):
+        # Refills the visible line from the full-resolution data for the current view
+        if self.line is None:
+            return
+        x_min, x_max = sorted(self.ax.get_xlim())
+        width = self.ax.get_window_extent().width
+        self.line.set_data(*decimate_min_max(self.full_x, self.full_y, x_min, x_max, width))
+        if self.overlay_y is not None:
+            self.overlay.set_segments([np.column_stack(decimate_min_max(self.full_x, y, x_min, x_max, width))
+                                       for y in self.overlay_y])
+
+    def set_overlay(self, overlay_data):
+        # Puts the rows of overlay_data (or nothing, for None) in the overlay collection
+        self.overlay_y = overlay_data
+        if overlay_data is None:
+            self.overlay.set_segments([])
+        else:
+            self.overlay.set_color([f"C{index % 9 + 1}" for index in range(len(overlay_data))])
+
+    def set_band(self, band):
+        # Shades a tolerance band, given as (frequencies, low, median, high, label), or removes it (None)
+        if self.band is not None:
+            self.band.remove()
+            self.band = None
+        if band is None:
+            self.band_median.set_data([], [])
+            return
+        frequencies, low, median, high, _ = band
+        self.band = self.ax.fill_between(frequencies, low, high, color='C0', alpha=0.2, linewidth=0, zorder=1)
+        self.band_median.set_data(frequencies, median)
+
+    def update_legend(self, labels, band):
+        # Rebuilds the legend when the design names or the band change (none if neither is shown)
+        labels = list(labels) if labels and self.overlay_y is not None else []
+        band_label = band[-1] if band is not None else None
+        key = (tuple(labels), band_label)
+        if key == self.legend_key:
+            return
+        self.legend_key = key
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+
+        handles = []
+        if labels:
+            handles.append(Line2D([], [], color='C0'))
+            handles += [Line2D([], [], color=f"C{index % 9 + 1}") for index in range(len(self.overlay_y))]
+        if band_label:
+            handles += [Patch(color='C0', alpha=0.2), Line2D([], [], color='C0', ls='--', lw=1.0)]
+            labels += [band_label, "Median"]
+        if handles:
+            self.ax.legend(handles, labels, loc='upper right', fontsize='small')
+
+    def show(self, frequencies, plot_data, graph_type, y_label, use_log_scale, annotation_formatter,
+             labels=None, band=None):
+        # Shows plot_data against frequencies as the given graph type.
+        # plot_data may be (designs x frequencies): the first row is drawn as the current
+        # design and the rest as overlays, named by labels (one per row) in the legend.
+        # @param band is an optional tolerance band (see set_band)
+        ax = self.ax
+        plot_data_cleaned = np.where(np.isfinite(plot_data), plot_data, np.nan)
+        overlay_data = None
+        if plot_data_cleaned.ndim > 1:
+            if len(plot_data_cleaned) > 1:
+                overlay_data = plot_data_cleaned[1:]
+            plot_data_cleaned = plot_data_cleaned[0]
+
+        line = self.lines.get(graph_type)
+        if line is None:
+            line, = ax.plot([], [], color='C0')
+            self.lines[graph_type] = line
+        for other in self.lines.values():
+            other.set_visible(other is line)
+            if other is not line:
+                other.set_data([], [])  # hidden lines don't need to hold any data
+        self.line = line
+        self.full_x, self.full_y = frequencies, plot_data_cleaned
+        self.set_overlay(overlay_data)
+        self.set_band(band)
+        self.update_legend(labels, band)
+
+        type_changed = graph_type != self.graph_type
+        if type_changed:
+            ax.set_title(f"System {graph_type}") # Dynamic title
+            ax.set_ylabel(y_label)  # Dynamic Y-label
+            # Apply correct Y-axis scale
+            ax.set_yscale('log' if use_log_scale else 'linear')
+            self.graph_type = graph_type
+            self.needs_layout = True
+
+        # Auto-set x-ticks based on range, or set manually
+        x_range = (frequencies[0], frequencies[-1])
+        if x_range != self.x_range:
+            ax.set_xticks(np.linspace(x_range[0], x_range[1], num=10, dtype=int))
+            ax.set_xlim(x_range)  # Set x-axis limits (also redecimates, via on_xlim_changed)
+            self.x_range = x_range
+        else:
+            self.redecimate()
+
+        # Y limits follow the data (every design), but only need recomputing when its range moved
+        finite = plot_data_cleaned[np.isfinite(plot_data_cleaned)]
+        if overlay_data is not None:
+            finite = np.concatenate([finite, overlay_data[np.isfinite(overlay_data)]])
+        if band is not None:
+            band_values = np.concatenate([band[1], band[3]])
+            finite = np.concatenate([finite, band_values[np.isfinite(band_values)]])
+        y_range = (finite.min(), finite.max()) if finite.size else None
+        if type_changed or y_range != self.y_range:
+            # The line only holds the zoomed-in, decimated points, so the limits come from the
+            # full data range rather than relim()
+            ax.set_autoscaley_on(True)
+            ax.ignore_existing_data_limits = True
+            if y_range is not None:
+                ax.update_datalim([(x_range[0], y_range[0]), (x_range[1], y_range[1])])
+            ax.autoscale_view(scalex=False)
+            if not use_log_scale:
+                ax.set_ylim(bottom=0 if not np.any(finite < 0) else None)
+            self.y_range = y_range
+
+        if self.needs_layout:
+            with instrumentation.span("draw.tight_layout"):
+                self.figure.tight_layout()
+            self.needs_layout = False
+
+        # The interactive cursor follows the visible line
+        if self.cursor is None:
+            self.cursor = CursorAnnotation(ax, line, annotation_formatter, (self.full_x, self.full_y))
+        else:
+            self.cursor.set_line(line, annotation_formatter, (self.full_x, self.full_y))
 
 
-def calculate_cone_excursion(core_results, w):
-    # Calculates cone excursion from core results
-    u = core_results.get('u', 0)
-    if not w: return 0
-    return (math.sqrt(2) * u) / w
+def get_graph_view(canvas):
+    # Returns the canvas' GraphView, creating a fresh one (and dropping the callbacks of the
+    # old one) the first time or after the figure was cleared elsewhere
+    view = getattr(canvas, 'graph_view', None)
+    if view is None or not view.is_attached():
+        if view is not None:
+            view.disconnect()
+        view = GraphView(canvas)
+        canvas.graph_view = view
+    return view
 
 
 def plot_selected_data(canvas, params, start_freq, stop_freq, graph_type, step):
-    # Loops through a frequency range, calls the main analysis function,
+    # Sweeps a frequency range through the model (or reuses a cached sweep)
     # and draws the result on the provided Tkinter canvas.
+    results = get_sweep_results(params, start_freq, stop_freq, step)
+    draw_sweep_results(canvas, results, graph_type)
 
-    # Create the list of frequencies to test
-    num_steps = int((stop_freq - start_freq) / step) + 1
-    frequencies = np.linspace(start_freq, stop_freq, num=num_steps)
-    plot_data = [] # Stores the y-values for the plot
-    phase_data_rad = []
 
-    # Loop and extract the correct data based on the graph_type
-    for freq in frequencies:
-        if freq == 0:  # Avoid calculations exactly at 0 Hz
-            results = {"zin": float('inf'), "cone_excursion_mm": 0, "port_velocity_ms": 0, "zin_phase_rad": 0}
-        else:
-            results = run_full_analysis_at_frequency(freq, params)
-        if graph_type == "Impedance":
-            plot_data.append(abs(results.get("zin", float('inf'))))
-        elif graph_type == "Cone Excursion (mm)":
-            plot_data.append(results.get("cone_excursion_mm", 0))
-        elif graph_type == "Port Velocity (m/s)":
-            plot_data.append(results.get("port_velocity_ms", 0))
-        elif graph_type == "Group Delay (ms)":
-            phase_data_rad.append(results.get("zin_phase_rad", 0))
-        else:
-            plot_data.append(abs(results.get("zin", float('inf'))))
+def draw_sweep_results(canvas, results, graph_type, labels=None, tolerance_results=None):
+    # Draws one metric of an already computed sweep on the provided Tkinter canvas.
+    # The results are stored on the canvas so switching graph type can redraw without re-sweeping.
+    # A multi-design sweep draws its first design as the current one and overlays the others.
+    # @param labels optionally names each design for the legend
+    # @param tolerance_results is an optional tolerance.run_tolerance_analysis result; the
+    #  graph's metric is shaded between its outer percentiles
+    frequencies = results.frequency
 
-    # Setup plot based on type after data gathering
+    # Setup plot based on type
     if graph_type == "Impedance":
+        plot_data = results.magnitude()
         y_label = "Impedance (Ohms)"
         use_log_scale = True
         annotation_formatter = lambda x, y: f"Freq: {x:.1f} Hz\nImp: {y:.1f} Ω"
     elif graph_type == "Cone Excursion (mm)":
+        plot_data = results.cone_excursion_mm
         y_label = "Cone Excursion (mm)"
         use_log_scale = False
         annotation_formatter = lambda x, y: f"Freq: {x:.1f} Hz\nExc: {y:.2f} mm"
     elif graph_type == "Port Velocity (m/s)":
+        plot_data = results.port_velocity_ms
         y_label = "Port Velocity (m/s)"
         use_log_scale = False
         annotation_formatter = lambda x, y: f"Freq: {x:.1f} Hz\nVel: {y:.2f} m/s"
     elif graph_type == "Group Delay (ms)":
+        plot_data = results.group_delay_ms
         y_label = "Group Delay (ms)"
         use_log_scale = False
         annotation_formatter = lambda x, y: f"Freq: {x:.1f} Hz\nGD: {y:.2f} ms"
-
-        # --- Calculate Group Delay ---
-        # Need angular frequencies (omega = 2*pi*f)
-        angular_frequencies = 2 * np.pi * frequencies
-
-        # Unwrap phase to handle jumps (e.g., from +pi to -pi)
-        unwrapped_phase = np.unwrap(phase_data_rad)
-
-        # Numerical derivative of phase w.r.t. angular frequency
-        # np.gradient calculates the gradient using central differences
-        # Use edge_order=2 for potentially better accuracy at edges
-        dphi_domega = np.gradient(unwrapped_phase, angular_frequencies, edge_order=2)
-        # Group Delay = -dphi/domega (in seconds)
-        group_delay_sec = -dphi_domega
-
-        # Convert to milliseconds
-        plot_data = group_delay_sec * 1000
-        # ---------------------------
-
     else: # Fallback case
         graph_type = "Impedance" # Ensure title reflects fallback
+        plot_data = results.magnitude()
         y_label = "Impedance (Ohms)"
         use_log_scale = True
         annotation_formatter = lambda x, y: f"Freq: {x:.1f} Hz\nImp: {y:.1f} Ω"
 
-    # Plotting Section (updates based on selected type)
-    fig = canvas.figure
-    fig.clear()
-    ax = fig.add_subplot(111)
-
-    # Draw the new plot on the axes
-    plot_data_cleaned = [d if np.isfinite(d) else np.nan for d in plot_data]
-    line, = ax.plot(frequencies, plot_data_cleaned) # Plot the selected data
-    ax.set_title(f"System {graph_type}") # Dynamic title
-    ax.set_xlabel("Frequency (Hz)")
-    ax.set_ylabel(y_label)  # Dynamic Y-label
-    ax.grid(True, which="both", ls="--", c='0.7')
-    # Apply correct Y-axis scale
-    if use_log_scale:
-        ax.set_yscale('log')
-    else:
-        ax.set_yscale('linear')
-        ax.set_ylim(bottom=0 if min(plot_data_cleaned, default=0) >= 0 else None)
-
-    # Auto-set x-ticks based on range, or set manually
-    ax.set_xticks(np.linspace(start_freq, stop_freq, num=10, dtype=int))
-    ax.set_xlim(start_freq, stop_freq)  # Set x-axis limits
-    fig.tight_layout()
-
-    # Create the interactive cursor object
-    cursor = CursorAnnotation(ax, line, annotation_formatter)
-    # Store it on the canvas to prevent it from being garbage-collected
-    canvas.cursor_annotation = cursor
+    band = None
+    if tolerance_results is not None:
+        key = next(key for key, metric_graph in tolerance.METRICS.items() if metric_graph == graph_type)
+        low, median, high = tolerance_results[key]
+        percentiles = tolerance_results['percentiles']
+        band = (tolerance_results['frequency'], low, median, high,
+                f"{percentiles[0]:g}-{percentiles[-1]:g}% ({tolerance_results['num_samples']} samples)")
+
+    # Plotting Section (updates the persistent axes and lines in place)
+    view = get_graph_view(canvas)
+    with instrumentation.span("draw.update_artists"):
+        view.show(frequencies, plot_data, graph_type, y_label, use_log_scale, annotation_formatter,
+                  labels, band)
+    # Store the cursor on the canvas to prevent it from being garbage-collected
+    canvas.cursor_annotation = view.cursor
+
+    # Keep the full sweep so other graph types can be drawn from it
+    canvas.sweep_results = results
+    canvas.design_labels = labels
+    canvas.tolerance_results = tolerance_results
 
     # Redraw the canvas
-    canvas.draw()
+    with instrumentation.span("draw.canvas"):
+        canvas.draw()
     print("Plot updated.")
\ No newline at end of file
@@ -0,0 +1,1040 @@
+# Core model of the port tuning calculator.
+# Only depends on NumPy (no tkinter or matplotlib), so it can be imported quickly by headless
+# tools such as the batch CLI, the solvers and the optimizer as well as by the GUI.
+import math
+import cmath
+import threading
+from collections import OrderedDict
+import numpy as np
+from . import instrumentation
+
+#conversion constants needed for port tuning calculations
+M2_TO_IN2 = 1550.003
+M2_TO_CM2 = 10000.0
+M3_TO_IN3 = 61023.7
+M3_TO_L = 1000.0
+M_TO_IN = 39.3701
+M_TO_CM = 100.0
+
+def calculate_port_diameter(value):
+    # Converts port area in cm^2 to diameter in cm for DIY audio equation
+    return 2 * math.sqrt(value / math.pi)
+
+
+def port_tuning_calculation(params):
+    # Calculates port tuning freq (fb) using averaged formula.
+    # Extracts SI values from params dict and converts internally.
+
+    # Get SI values from params
+    # Sd is already in m^2, Vb is already in m^3
+    port_area_m2 = params.get('port_area_m2', 0)  # Use Sd for port area in m^2
+    net_volume_m3 = params.get('vb', 0)  # Use Vb for net volume in m^3
+    port_length_m = params.get('port_length_m', 0)  # Get Port Length in meters
+    number_of_ports = params.get('number_of_ports', 1)
+    end_correction_factor = params.get('end_correction', 0.732)  # Get factor
+
+    # --- Internal Conversions ---
+    port_area_in2 = (port_area_m2 * M2_TO_IN2) * number_of_ports  # Total area in^2
+    port_area_cm2 = (port_area_m2 * M2_TO_CM2)  # Single port area cm^2 for diameter calc
+    net_volume_in3 = net_volume_m3 * M3_TO_IN3
+    net_volume_l = net_volume_m3 * M3_TO_L
+    port_length_in = port_length_m * M_TO_IN
+    port_length_cm = port_length_m * M_TO_CM
+
+    # Check for zero values to prevent division errors
+    if net_volume_m3 <= 0 or port_area_m2 <= 0 or number_of_ports <= 0:
+        return 0  # Or raise an error
+
+    port_diameter_cm = calculate_port_diameter(port_area_cm2)
+    if port_diameter_cm <= 0:
+        return 0  # Avoid math domain error later
+
+    # JL Audio equation
+    jl_denominator = (net_volume_in3 * (port_length_in + end_correction_factor * math.sqrt(port_area_in2 / number_of_ports))) # Use single port area for sqrt part
+    if jl_denominator <= 0:
+        port_tuning1 = 0
+    else:
+        port_tuning1 = 0.159 * math.sqrt(port_area_in2 * 1.84E8 / jl_denominator)
+
+
+    # DIY Audio equation
+    diy_denominator = (math.sqrt(net_volume_l) * math.sqrt(port_length_cm + end_correction_factor * port_diameter_cm))
+    if diy_denominator == 0:
+         port_tuning2 = 0
+    else:
+        port_tuning2 = (153.501 * port_diameter_cm * math.sqrt(number_of_ports)) / diy_denominator
+
+
+    # Return average, handle potential NaN if one formula failed
+    if math.isnan(port_tuning1) or math.isnan(port_tuning2):
+        # Decide how to handle: return 0, return the valid one, or raise error
+        if not math.isnan(port_tuning1): return port_tuning1
+        if not math.isnan(port_tuning2): return port_tuning2
+        return 0 # Fallback if both fail
+    else:
+        return (port_tuning1 + port_tuning2) / 2
+
+def port_tuning_calculation_array(params):
+    # Vectorized port_tuning_calculation. Any params value may be a NumPy array
+    # (e.g. one entry per design); the result has the broadcast shape of the inputs.
+    # Complex inputs are carried through (for complex-step derivatives, see sensitivity.py).
+    port_area_m2 = _float_array(params.get('port_area_m2', 0))
+    net_volume_m3 = _float_array(params.get('vb', 0))
+    port_length_m = _float_array(params.get('port_length_m', 0))
+    number_of_ports = _float_array(params.get('number_of_ports', 1))
+    end_correction_factor = _float_array(params.get('end_correction', 0.732))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # --- Internal Conversions ---
+        port_area_in2 = (port_area_m2 * M2_TO_IN2) * number_of_ports
+        port_area_cm2 = port_area_m2 * M2_TO_CM2
+        net_volume_in3 = net_volume_m3 * M3_TO_IN3
+        net_volume_l = net_volume_m3 * M3_TO_L
+        port_length_in = port_length_m * M_TO_IN
+        port_length_cm = port_length_m * M_TO_CM
+        port_diameter_cm = 2 * np.sqrt(port_area_cm2 / np.pi)
+
+        # JL Audio equation
+        jl_denominator = net_volume_in3 * (port_length_in + end_correction_factor * np.sqrt(port_area_in2 / number_of_ports))
+        port_tuning1 = np.where(jl_denominator > 0, 0.159 * np.sqrt(port_area_in2 * 1.84E8 / jl_denominator), 0)
+
+        # DIY Audio equation
+        diy_denominator = np.sqrt(net_volume_l) * np.sqrt(port_length_cm + end_correction_factor * port_diameter_cm)
+        port_tuning2 = np.where(diy_denominator != 0,
+                                (153.501 * port_diameter_cm * np.sqrt(number_of_ports)) / diy_denominator, 0)
+
+    # Average, falling back to whichever formula is valid (same rules as the scalar version)
+    nan1 = np.isnan(port_tuning1)
+    nan2 = np.isnan(port_tuning2)
+    fb = np.where(nan1 | nan2,
+                  np.where(~nan1, port_tuning1, np.where(~nan2, port_tuning2, 0)),
+                  (port_tuning1 + port_tuning2) / 2)
+
+    # Zero values would cause division errors
+    valid = (net_volume_m3 > 0) & (port_area_m2 > 0) & (number_of_ports > 0)
+    return np.where(valid, fb, 0.0)
+
+def _complex(real, imag):
+    # real + 1j*imag, filled in place rather than through complex temporaries
+    if np.iscomplexobj(real) or np.iscomplexobj(imag):
+        return real + 1j * imag
+    value = np.empty(np.broadcast_shapes(np.shape(real), np.shape(imag)), dtype=complex)
+    value.real = real
+    value.imag = imag
+    return value
+
+def _float_array(value):
+    # Returns value as a float array, or a complex one if it already is complex
+    value = np.asarray(value)
+    return value if np.iscomplexobj(value) else value.astype(float)
+
+def run_full_analysis_at_frequency(frequency, params):
+   # This is the main controller function for this file.
+   # As the name suggests, it will run all computations for a given frequency
+   # Args:
+    # frequency (float): The frequency to analyze (given in Hz)
+    # params (dict): A dictionary of all driver/enclosure parameters
+   # Returns:  Dictionary of all final calculations
+
+    # ----
+    # Calculate intermediate values
+    # ----
+
+    # w represents angular tuning frequency. Note that this is distinctly different than wb.
+    # This value is used during analysis and will vary based on the frequency being calculated.
+    w = 2.0 * math.pi * frequency
+
+    # s represents the common abbreviation for j*w where j in an imaginary number.
+    s = 1j * w
+
+    # First, calculate fb using your averaged formula
+    fb = port_tuning_calculation(params)
+
+    # Now, use fb to calculate the rest of the physics components
+
+    # wb represents angular box tuning frequency as 2*PI*port_tuning
+    wb = 2.0 * math.pi * fb
+
+    # ccab represents the acoustic compliance of the enclosure volume
+    ccab = calculate_ccab(params['vb'], params['p0'], params['c'])
+
+    # ral represents the acoustic resistance modeling air leak
+    ral = calculate_ral(params['ql'], wb, ccab)
+
+    # lmap represents angular frequency as 2*PI*frequency
+    lmap = calculate_lmap(wb, ccab)
+
+    # ----
+    # Run the core physics simulation
+    # ----
+
+    core_results = calculate_pd_i_u(s, params, ccab, ral, lmap, z_mech=None)
+
+    # ----
+    # Use core results to find final values
+    # ----
+
+    num_ports = params.get('number_of_ports', 1)
+    single_port_area_m2 = params.get('port_area_m2', 0) / num_ports if num_ports > 0 else 0
+    port_vel = calculate_port_velocity(core_results, single_port_area_m2, s, lmap)
+    cone_exc = calculate_cone_excursion(core_results, w)
+    zin_phase_radians = cmath.phase(core_results['zin'])  # Phase in radians
+
+    # ----
+    # Return all results as dictionary of values
+    # ----
+
+    return {
+        "frequency": frequency,
+        "zin": core_results['zin'],
+        "zin_phase_rad": zin_phase_radians,
+        "i": core_results['i'],
+        "u": core_results['u'],
+        "pd": core_results['pd'],
+        "fb": fb,
+        "port_velocity_ms": abs(port_vel),
+        "cone_excursion_mm": abs(cone_exc) * 1000,
+        # Add other results as needed
+    }
+
+# ----
+# Pure Math Functions
+# ---
+
+def calculate_ccab(vb, p0, c):
+    # Calculates acoustic compliance of the enclosure
+    return vb / (p0 * c ** 2)
+
+
+def calculate_ral(ql, wb, ccab):
+    # Calculates acoustic resistance (losses)
+    return ql / (wb * ccab)
+
+
+def calculate_lmap(wb, ccab):
+    # Calculates acoustic mass (inductance) of the port
+    return 1 / (wb ** 2 * ccab)
+
+
+def calculate_pd_i_u(s, params, ccab, ral, lmap, z_mech=None):
+    # Core physics simulation
+    # Accepts all parameters as arguments.
+
+    # Get values from the params dict
+    re = params['re']
+    le = params['le']
+    rms = params['rms']
+    mms = params['mms']
+    cms = params['cms']
+    bl = params['bl']
+    sd = params['sd']
+    vg = params['vg']
+
+    # Calculate mechanical impedance
+    if z_mech is None:
+        try:
+            z_mech = rms + s * mms + (1 / (s * cms) if s else float('inf'))
+        except ZeroDivisionError:
+            z_mech = float('inf')
+
+    # Calculate electrical impedance
+    z_elec = re + s * le
+    try:
+        zb_inv = (s * ccab if ccab != float('inf') else 0) + \
+                 (1 / ral if ral != float('inf') and ral != 0 else 0) + \
+                 (1 / (s * lmap) if s and lmap != float('inf') else 0)
+        zb = 1 / zb_inv if zb_inv else float('inf')
+    except ZeroDivisionError:
+        zb = float('inf')
+
+    # Combine impedances
+    z_mech_total = z_mech + sd ** 2 * zb if z_mech != float('inf') and zb != float('inf') else float('inf')
+    zin = z_elec + (bl ** 2 / z_mech_total) if z_mech_total else z_elec # Avoid division by zero
+
+    # ----
+    # Solve for primary unknowns
+    # ----
+
+    # i represents the loop mesh current of the amplifier/driver electrical portions of the circuit model
+    i = vg / zin if zin else 0
+
+    # pd represents the voltage across loop mesh of the driver acoustical and box portion of the circuit model
+    pd = i * (bl * sd * zb) / z_mech_total if z_mech_total else 0
+
+    # u represents the loop mesh current of the driver mechanical portions of the circuit model
+    u = (bl * i - sd * pd) / z_mech if z_mech else 0
+
+    return {
+        "zin": zin,
+        "i": i,
+        "u": u,
+        "pd": pd,
+        "zb": zb
+    }
+
+
+def calculate_port_velocity(core_results, single_port_area_m2, s, lmap):
+    # Calculates port velocity from core results
+
+    pd = core_results.get('pd', 0)
+
+    if not s or lmap == float('inf') or single_port_area_m2 <= 0:
+        return 0
+
+    # Calculates the impedance of the port
+    zlmap = s * lmap
+
+    # Calculates RMS port velocity
+    ilmap = pd / zlmap
+
+    if not zlmap: return 0
+
+    # Returns the peak velocity (RMS * sqrt(s))/area
+    return (ilmap * math.sqrt(2)) / single_port_area_m2
+
+
+def calculate_cone_excursion(core_results, w):
+    # Calculates cone excursion from core results
+    u = core_results.get('u', 0)
+    if not w: return 0
+    return (math.sqrt(2) * u) / w
+
+
+# ----
+# Sweep Result Container
+# ----
+
+class SweepResult(object):
+    # Columnar container for a frequency sweep. Every metric is a contiguous NumPy
+    # array indexed by frequency point, so plotting, export and analysis can all read
+    # the same buffers instead of copying values out of per-point dicts.
+    # Multi-design sweeps store one row per design (designs x frequencies) and one fb per design.
+    # @param frequency is the array of frequencies (Hz), sorted ascending
+    # @param zin is the complex input impedance at each frequency
+    # @param i, u and pd are the complex loop currents/pressure from the circuit model
+    # @param port_velocity_ms is the peak port air velocity (m/s)
+    # @param cone_excursion_mm is the peak cone excursion (mm)
+    # @param group_delay_ms is the group delay of the impedance phase (ms). PreparedSystem passes the
+    # exact value; if it isn't given it is estimated from the phase the first time it's used.
+    # @param fb is the port tuning frequency (Hz) of the design
+
+    __slots__ = ('frequency', 'zin', 'zin_phase_rad', 'i', 'u', 'pd',
+                 'port_velocity_ms', 'cone_excursion_mm', '_group_delay_ms', 'fb')
+
+    # Names of the per-frequency arrays (everything except fb)
+    ARRAY_FIELDS = ('frequency', 'zin', 'zin_phase_rad', 'i', 'u', 'pd',
+                    'port_velocity_ms', 'cone_excursion_mm', 'group_delay_ms')
+
+    def __init__(self, frequency, zin, i, u, pd, port_velocity_ms, cone_excursion_mm,
+                 fb, group_delay_ms=None, zin_phase_rad=None):
+        # np.asarray only copies to convert the dtype, so slices of a result (e.g. frequency_range
+        # of a designs x frequencies sweep) stay views of it
+        self.frequency = np.asarray(frequency, dtype=float)
+        self.zin = np.asarray(zin, dtype=complex)
+        self.zin_phase_rad = np.angle(self.zin) if zin_phase_rad is None else np.asarray(zin_phase_rad, dtype=float)
+        self.i = np.asarray(i, dtype=complex)
+        self.u = np.asarray(u, dtype=complex)
+        self.pd = np.asarray(pd, dtype=complex)
+        self.port_velocity_ms = np.asarray(port_velocity_ms, dtype=float)
+        self.cone_excursion_mm = np.asarray(cone_excursion_mm, dtype=float)
+        self._group_delay_ms = None if group_delay_ms is None else np.asarray(group_delay_ms, dtype=float)
+        self.fb = fb
+
+    @property
+    def group_delay_ms(self):
+        if self._group_delay_ms is None:
+            if len(self.frequency) >= 3:
+                self._group_delay_ms = calculate_group_delay_ms(self.frequency, self.zin_phase_rad)
+            else:
+                self._group_delay_ms = np.full(self.zin.shape, np.nan)
+            if not self.zin.flags.writeable:
+                self._group_delay_ms.flags.writeable = False
+        return self._group_delay_ms
+
+    def __len__(self):
+        return len(self.frequency)
+
+    def __getitem__(self, index):
+        # Slices every array the same way along the frequency axis. Plain slices return views (no copy).
+        if not isinstance(index, slice):
+            raise TypeError("SweepResult only supports slice indexing")
+        arrays = {name: getattr(self, name)[..., index] for name in self.ARRAY_FIELDS}
+        return SweepResult(arrays.pop('frequency'), fb=self.fb, **arrays)
+
+    @property
+    def num_designs(self):
+        # Number of design rows, or None for a single-design sweep
+        return None if self.zin.ndim == 1 else self.zin.shape[0]
+
+    def design(self, index):
+        # Returns one design of a multi-design sweep as its own SweepResult (views, no copy)
+        arrays = {name: getattr(self, name)[index] for name in self.ARRAY_FIELDS if name != 'frequency'}
+        return SweepResult(self.frequency, fb=self.fb[index], **arrays)
+
+    def frequency_range(self, start_freq, stop_freq):
+        # Returns a view of the points with start_freq <= frequency <= stop_freq (no copy)
+        start = np.searchsorted(self.frequency, start_freq, side='left')
+        stop = np.searchsorted(self.frequency, stop_freq, side='right')
+        return self[start:stop]
+
+    def magnitude(self):
+        # Returns |Zin| in ohms
+        return np.abs(self.zin)
+
+    def set_read_only(self):
+        # Locks every array so a shared (cached) result can't be changed by accident
+        for name in self.ARRAY_FIELDS:
+            getattr(self, name).flags.writeable = False
+        return self
+
+    @staticmethod
+    def concatenate(parts, sort=False):
+        # Joins consecutive pieces of one sweep (e.g. evaluated chunk by chunk) along the frequency axis.
+        # With sort=True the pieces may overlap (e.g. refinement passes) and the points are
+        # put back in frequency order.
+        # Group delay is only carried over when every part has it (otherwise it is recomputed)
+        names = [name for name in SweepResult.ARRAY_FIELDS
+                 if name != 'group_delay_ms' or all(part._group_delay_ms is not None for part in parts)]
+        arrays = {name: np.concatenate([getattr(part, name) for part in parts], axis=-1) for name in names}
+        if sort:
+            order = np.argsort(arrays['frequency'], kind='stable')
+            arrays = {name: values[..., order] for name, values in arrays.items()}
+        return SweepResult(arrays.pop('frequency'), fb=parts[0].fb, **arrays)
+
+
+# ----
+# Prepared System (Vectorized Sweeps)
+# ----
+
+# Points (designs x frequencies) evaluated per block of a sweep. The model makes a couple of
+# dozen temporary arrays per block; at this size they stay in the CPU cache, which is up to
+# twice as fast per point as running a long sweep in one pass.
+SWEEP_BLOCK_POINTS = 2048
+# Fewest frequencies worth a block of their own: with many designs, narrower blocks cost more
+# in per-block overhead than the cache saves, so the sweep runs in one pass instead
+SWEEP_BLOCK_MIN_FREQUENCIES = 256
+
+class PreparedSystem(object):
+    # Holds every frequency-independent term of the model so a sweep only has to
+    # do the per-frequency math. Build it once from the params dict returned by
+    # gather_all_inputs() and call evaluate() for one frequency or many.
+    # @param params is the dictionary of all driver/enclosure parameters (SI units).
+    # Any value may instead be a 1-D array with one entry per design; the system then
+    # evaluates every design at once and sweeps come back as (designs x frequencies) arrays.
+
+    __slots__ = ('fb', 'ccab', 'ral', 'lmap',
+                 're', 'le', 'bl', 'sd', 'cms', 'mms', 'rms', 'vg',
+                 'leak_conductance', 'single_port_area_m2', 'num_designs')
+
+    def __init__(self, params):
+        self.num_designs = None
+        if any(np.ndim(value) > 0 for value in params.values()):
+            self._prepare_designs(params)
+            return
+
+        # Port tuning and the box/port acoustic elements
+        self.fb = port_tuning_calculation(params)
+        wb = 2.0 * math.pi * self.fb
+        self.ccab = calculate_ccab(params['vb'], params['p0'], params['c'])
+        if wb:
+            self.ral = calculate_ral(params['ql'], wb, self.ccab)
+            self.lmap = calculate_lmap(wb, self.ccab)
+        else:
+            # Invalid port geometry: no leak resistance or port mass to speak of
+            self.ral = float('inf')
+            self.lmap = float('inf')
+        self.leak_conductance = 1 / self.ral if self.ral != 0 else 0
+
+        # Driver constants
+        self.re = params['re']
+        self.le = params['le']
+        self.bl = params['bl']
+        self.sd = params['sd']
+        self.cms = params['cms']
+        self.mms = params['mms']
+        self.rms = params['rms']
+        self.vg = params['vg']
+
+        num_ports = params.get('number_of_ports', 1)
+        self.single_port_area_m2 = params.get('port_area_m2', 0) / num_ports if num_ports > 0 else 0
+
+    def _prepare_designs(self, params):
+        # Same terms as __init__, stored as (designs x 1) columns so they broadcast against
+        # a row of frequencies. Values shared by every design stay scalar, so terms that only
+        # depend on them (e.g. the box when just the driver varies) are computed per frequency
+        # rather than per design and frequency.
+        # (complex values are kept, see sensitivity.response_jacobian)
+        columns = {key: _float_array(value) for key, value in params.items()}
+        num_designs = max(np.size(value) for value in columns.values() if np.ndim(value) > 0)
+        columns = {key: np.broadcast_to(value, (num_designs,)).reshape(num_designs, 1) if np.ndim(value) > 0
+                   else value for key, value in columns.items()}
+        self.num_designs = num_designs
+
+        self.fb = port_tuning_calculation_array(columns)
+        wb = 2.0 * np.pi * self.fb
+        self.ccab = calculate_ccab(columns['vb'], columns['p0'], columns['c'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.ral = np.where(wb > 0, calculate_ral(columns['ql'], wb, self.ccab), np.inf)
+            self.lmap = np.where(wb > 0, calculate_lmap(wb, self.ccab), np.inf)
+            self.leak_conductance = np.where(self.ral != 0, 1 / self.ral, 0)
+
+        self.re = columns['re']
+        self.le = columns['le']
+        self.bl = columns['bl']
+        self.sd = columns['sd']
+        self.cms = columns['cms']
+        self.mms = columns['mms']
+        self.rms = columns['rms']
+        self.vg = columns['vg']
+
+        num_ports = columns.get('number_of_ports', 1.0)
+        port_area = columns.get('port_area_m2', 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.single_port_area_m2 = np.where(num_ports > 0, port_area / num_ports, 0)
+
+    def evaluate(self, frequencies):
+        # Runs the model at the given frequency (float) or frequencies (array-like).
+        # Returns: For a single frequency, a dictionary with the same keys as
+        #  run_full_analysis_at_frequency. For an array (or any input when the system holds
+        #  several designs), a SweepResult. A frequency of 0 Hz gives zin = inf and zero for the rest.
+        if np.ndim(frequencies) == 0 and self.num_designs is None:
+            return self._evaluate_point(float(frequencies))
+        return self._evaluate_array(np.atleast_1d(np.asarray(frequencies, dtype=float)))
+
+    def _evaluate_point(self, frequency):
+        # Scalar fast path (plain Python complex math, no dict lookups)
+        if frequency == 0:
+            return {"frequency": frequency, "zin": float('inf'), "zin_phase_rad": 0, "i": 0, "u": 0,
+                    "pd": 0, "fb": self.fb, "port_velocity_ms": 0, "cone_excursion_mm": 0}
+
+        w = 2.0 * math.pi * frequency
+        s = 1j * w
+
+        z_elec = self.re + s * self.le
+        if not self.cms or not self.ccab:
+            # No suspension compliance or no box volume: the cone is held still, so only the
+            # voice coil is left (as in calculate_pd_i_u). Without a box the pressure tends to bl*i/sd.
+            i = self.vg / z_elec
+            pd = self.bl * i / self.sd if self.cms and self.sd else 0
+            return {"frequency": frequency, "zin": z_elec, "zin_phase_rad": cmath.phase(z_elec), "i": i, "u": 0,
+                    "pd": pd, "fb": self.fb, "port_velocity_ms": 0, "cone_excursion_mm": 0}
+
+        z_mech = self.rms + 1j * (w * self.mms - 1 / (w * self.cms))
+        zb = 1 / (self.leak_conductance + 1j * (w * self.ccab - 1 / (w * self.lmap)))
+
+        z_mech_total = z_mech + self.sd ** 2 * zb
+        zin = z_elec + self.bl ** 2 / z_mech_total
+        i = self.vg / zin
+        pd = i * (self.bl * self.sd * zb) / z_mech_total
+        u = (self.bl * i - self.sd * pd) / z_mech
+
+        if self.single_port_area_m2 > 0:
+            port_vel = (pd / (s * self.lmap)) * math.sqrt(2) / self.single_port_area_m2
+        else:
+            port_vel = 0
+        cone_exc = (math.sqrt(2) * u) / w
+
+        return {
+            "frequency": frequency,
+            "zin": zin,
+            "zin_phase_rad": cmath.phase(zin),
+            "i": i,
+            "u": u,
+            "pd": pd,
+            "fb": self.fb,
+            "port_velocity_ms": abs(port_vel),
+            "cone_excursion_mm": abs(cone_exc) * 1000,
+        }
+
+    def _evaluate_array(self, frequencies):
+        # Vectorized path, SWEEP_BLOCK_POINTS at a time along the frequencies (few designs only)
+        fb = self.fb
+        block = SWEEP_BLOCK_POINTS // (self.num_designs or 1)
+        if len(frequencies) <= block or block < SWEEP_BLOCK_MIN_FREQUENCIES:
+            outputs = self._evaluate_block(frequencies)
+            if self.num_designs is not None:
+                # Every design gets its own row, even for metrics that came out the same for all
+                shape = (self.num_designs, len(frequencies))
+                outputs = [value if value.shape == shape else np.broadcast_to(value, shape).copy()
+                           for value in outputs]
+        else:
+            shape = (len(frequencies),) if self.num_designs is None else (self.num_designs, len(frequencies))
+            outputs = [np.empty(shape, dtype=complex) for _ in range(4)] + [np.empty(shape) for _ in range(3)]
+            for start in range(0, len(frequencies), block):
+                for output, value in zip(outputs, self._evaluate_block(frequencies[start:start + block])):
+                    output[..., start:start + block] = value
+
+        if self.num_designs is not None:
+            fb = np.broadcast_to(fb, (self.num_designs, 1)).ravel()
+        zin, i, u, pd, port_velocity_ms, cone_excursion_mm, group_delay_ms = outputs
+        return SweepResult(frequencies, zin, i, u, pd, port_velocity_ms, cone_excursion_mm, fb,
+                           group_delay_ms=group_delay_ms)
+
+    def _evaluate_block(self, frequencies):
+        # One block of the vectorized path. s is purely imaginary, so the reactive parts are built
+        # from w with real math (much cheaper than complex division on every element)
+        # Returns: (zin, i, u, pd, port_velocity_ms, cone_excursion_mm, group_delay_ms)
+        w = 2.0 * np.pi * frequencies
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse_w = 1 / w
+
+            # Mechanical, electrical and box impedance (see calculate_pd_i_u)
+            z_mech = _complex(self.rms, w * self.mms - inverse_w / self.cms)
+            z_elec = _complex(self.re, w * self.le)
+            zb = 1 / _complex(self.leak_conductance, w * self.ccab - inverse_w / self.lmap)
+
+            # Combine impedances and solve for the primary unknowns
+            # (1 / z_mech_total is used three times, so it is only divided out once)
+            z_mech_total = z_mech + self.sd ** 2 * zb
+            y_mech_total = 1 / z_mech_total
+            zin = z_elec + self.bl ** 2 * y_mech_total
+            i = self.vg / zin
+            pd = i * (self.bl * self.sd * zb) * y_mech_total
+            u = (self.bl * i - self.sd * pd) / z_mech
+
+            # Peak port velocity and cone excursion (w and lmap are real, so the magnitudes are
+            # taken first and divided by real numbers)
+            port_velocity_ms = np.where(self.single_port_area_m2 > 0,
+                                        np.abs(pd) * (inverse_w * (math.sqrt(2) / (self.lmap * self.single_port_area_m2))),
+                                        0)
+            cone_excursion_mm = np.abs(u) * (inverse_w * (math.sqrt(2) * 1000))
+
+            # Group delay from the exact derivative of zin with respect to w:
+            # -d(phase)/dw = -Im(dzin/dw / zin), each term differentiated in closed form.
+            # Every term of dzin/dw is j times a real factor (dz_mech/dw = j*(mms + 1/(w^2*cms)),
+            # dzb/dw = -j*zb^2*(ccab + 1/(w^2*lmap))), so dzin/dw = j*dzin_j and
+            # -Im(j*dzin_j / zin) = -Re(dzin_j / zin)
+            inverse_w2 = inverse_w * inverse_w
+            dz_mech_total_j = (self.mms + inverse_w2 / self.cms) - (self.sd ** 2 * (self.ccab + inverse_w2 / self.lmap)) * zb ** 2
+            dzin_j = self.le - self.bl ** 2 * dz_mech_total_j * y_mech_total ** 2
+            group_delay_ms = -(dzin_j / zin).real * 1000
+
+            # Designs whose cone is held still (no cms or no box volume, see _evaluate_point)
+            locked = (self.cms == 0) | (self.ccab == 0)
+            if np.any(locked):
+                zin = np.where(locked, z_elec, zin)
+                i = np.where(locked, self.vg / z_elec, i)
+                pd = np.where(locked, np.where((self.cms != 0) & (self.sd != 0), self.bl * i / self.sd, 0), pd)
+                u = np.where(locked, 0, u)
+                port_velocity_ms = np.where(locked, 0, port_velocity_ms)
+                cone_excursion_mm = np.where(locked, 0, cone_excursion_mm)
+                group_delay_ms = np.where(locked, -(self.le / z_elec).real * 1000, group_delay_ms)
+
+        # Match the 0 Hz handling used by the scalar path
+        zero_mask = frequencies == 0
+        if zero_mask.any():
+            zin = np.where(zero_mask, np.inf, zin)
+            i = np.where(zero_mask, 0, i)
+            u = np.where(zero_mask, 0, u)
+            pd = np.where(zero_mask, 0, pd)
+            port_velocity_ms = np.where(zero_mask, 0, port_velocity_ms)
+            cone_excursion_mm = np.where(zero_mask, 0, cone_excursion_mm)
+            group_delay_ms = np.where(zero_mask, np.nan, group_delay_ms)
+
+        return zin, i, u, pd, port_velocity_ms, cone_excursion_mm, group_delay_ms
+
+    def rational_model(self):
+        # Compiles this (single-design) system into a RationalModel: polynomial numerators and
+        # denominators in s, with poles, zeros and exact impedance peaks
+        return RationalModel(self)
+
+
+def run_full_analysis_sweep(frequencies, params):
+    # Vectorized counterpart to run_full_analysis_at_frequency.
+    # Runs the whole frequency array through the model in one pass instead of
+    # calling the scalar version once per frequency.
+    # Args:
+    #  frequencies (array-like): Frequencies to analyze (given in Hz)
+    #  params (dict): A dictionary of all driver/enclosure parameters
+    # Returns: SweepResult holding one array per metric (frequencies should be sorted ascending).
+    #  A frequency of 0 Hz gives zin = inf and zero for the rest.
+    return PreparedSystem(params).evaluate(np.asarray(frequencies, dtype=float))
+
+
+# ----
+# Rational Transfer Function
+# ----
+
+class RationalModel(object):
+    # The model of one design compiled into polynomials in s = j*w. Every impedance in
+    # calculate_pd_i_u is a ratio of low-order polynomials:
+    #   z_mech = Nm / Dm = (s^2*mms*cms + s*rms*cms + 1) / (s*cms)
+    #   zb     = Nb / Db = s*lmap / (s^2*ccab*lmap + s*lmap/ral + 1)   (1 / (s*ccab + 1/ral) sealed)
+    # so with T = Nm*Db + sd^2*Nb*Dm and Z = (re + s*le)*T + bl^2*Dm*Db:
+    #   zin = Z / T,  i = vg*T / Z,  u = vg*bl*Dm*Db / Z,  pd = vg*bl*sd*Nb*Dm / Z
+    # Evaluating a sweep is then one small matrix product over powers of s, the poles and zeros of
+    # zin are polynomial roots, and its peaks and dips are found exactly from the roots of
+    # d|zin|^2/dw. The polynomials are kept in s/w0 (w0 = the driver resonance) so their
+    # coefficients stay well scaled.
+    # @param system is a single-design PreparedSystem (see PreparedSystem.rational_model)
+
+    __slots__ = ('w0', 'fb', 'vg', 'lmap', 'single_port_area_m2',
+                 'impedance_numerator', 'impedance_denominator',
+                 'displacement_numerator', 'pressure_numerator', '_coefficients')
+
+    def __init__(self, system):
+        if system.num_designs is not None:
+            raise ValueError("RationalModel needs a single-design system")
+        if system.mms > 0 and system.cms > 0:
+            self.w0 = 1 / math.sqrt(system.mms * system.cms)
+        else:
+            self.w0 = 2 * math.pi * 100.0
+        self.fb = system.fb
+        self.vg = system.vg
+        self.lmap = system.lmap
+        self.single_port_area_m2 = system.single_port_area_m2
+
+        # Each element of the network as (numerator, denominator) in s, highest power first
+        mech_numerator = np.array([system.mms * system.cms, system.rms * system.cms, 1.0])
+        mech_denominator = np.array([system.cms, 0.0])
+        if math.isinf(system.lmap):
+            # No port: zb is the box compliance (and leak) on its own
+            box_numerator = np.array([1.0])
+            box_denominator = np.array([system.ccab, system.leak_conductance])
+        else:
+            box_numerator = np.array([system.lmap, 0.0])
+            box_denominator = np.array([system.ccab * system.lmap, system.lmap * system.leak_conductance, 1.0])
+
+        mech_box = np.polymul(mech_denominator, box_denominator)
+        denominator = np.polyadd(np.polymul(mech_numerator, box_denominator),
+                                 system.sd ** 2 * np.polymul(box_numerator, mech_denominator))
+        numerator = np.polyadd(np.polymul([system.le, system.re], denominator), system.bl ** 2 * mech_box)
+
+        self.impedance_numerator = self._scaled(numerator)
+        self.impedance_denominator = self._scaled(denominator)
+        # u / vg and pd / vg share the impedance numerator as their denominator
+        self.displacement_numerator = self._scaled(system.bl * mech_box)
+        self.pressure_numerator = self._scaled(system.bl * system.sd * np.polymul(box_numerator, mech_denominator))
+
+        # All six polynomials evaluate from one set of powers of s, so they are stacked as the
+        # columns of one matrix: Z, T, u, pd, Z' and T'
+        polynomials = (self.impedance_numerator, self.impedance_denominator, self.displacement_numerator,
+                       self.pressure_numerator, np.polyder(self.impedance_numerator),
+                       np.polyder(self.impedance_denominator))
+        self._coefficients = np.zeros((max(len(polynomial) for polynomial in polynomials), len(polynomials)))
+        for column, polynomial in enumerate(polynomials):
+            self._coefficients[len(self._coefficients) - len(polynomial):, column] = polynomial
+
+    def _scaled(self, coefficients):
+        # Rewrites a polynomial in s as one in s/w0 (and drops zero leading terms)
+        coefficients = np.trim_zeros(np.asarray(coefficients, dtype=float), 'f')
+        if coefficients.size == 0:
+            return np.zeros(1)
+        return coefficients * self.w0 ** np.arange(len(coefficients) - 1, -1, -1)
+
+    def impedance(self, frequencies):
+        # Returns zin at the given frequencies (Hz) as complex values
+        x = 1j * (2.0 * np.pi / self.w0) * np.asarray(frequencies, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.polyval(self.impedance_numerator, x) / np.polyval(self.impedance_denominator, x)
+
+    def evaluate(self, frequencies):
+        # Same as PreparedSystem.evaluate for an array of frequencies (Hz), from the polynomials.
+        # Returns: SweepResult
+        frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+        w = 2.0 * np.pi * frequencies
+        x = 1j * (w / self.w0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            numerator, denominator, displacement, pressure, numerator_slope, denominator_slope = \
+                (np.vander(x, len(self._coefficients)) @ self._coefficients).T
+            zin = numerator / denominator
+            drive = self.vg / numerator
+            i = drive * denominator
+            u = drive * displacement
+            pd = drive * pressure
+
+            if self.single_port_area_m2 > 0:
+                port_velocity_ms = np.abs(pd) * (math.sqrt(2) / (w * self.lmap * self.single_port_area_m2))
+            else:
+                port_velocity_ms = np.zeros(len(frequencies))
+            cone_excursion_mm = np.abs(u) * (math.sqrt(2) * 1000 / w)
+
+            # -d(phase)/dw = -Re(zin'(s) / zin), with zin'/zin = Z'/Z - T'/T
+            log_derivative = numerator_slope / numerator - denominator_slope / denominator
+            group_delay_ms = -log_derivative.real * (1000 / self.w0)
+
+        # Match the 0 Hz handling of the other paths
+        zero_mask = frequencies == 0
+        if zero_mask.any():
+            zin = np.where(zero_mask, np.inf, zin)
+            i = np.where(zero_mask, 0, i)
+            u = np.where(zero_mask, 0, u)
+            pd = np.where(zero_mask, 0, pd)
+            port_velocity_ms = np.where(zero_mask, 0, port_velocity_ms)
+            cone_excursion_mm = np.where(zero_mask, 0, cone_excursion_mm)
+            group_delay_ms = np.where(zero_mask, np.nan, group_delay_ms)
+
+        return SweepResult(frequencies, zin, i, u, pd, port_velocity_ms, cone_excursion_mm, self.fb,
+                           group_delay_ms=group_delay_ms)
+
+    def poles(self):
+        # Returns the poles of zin (complex, rad/s)
+        return np.roots(self.impedance_denominator) * self.w0
+
+    def zeros(self):
+        # Returns the zeros of zin (complex, rad/s); they are also the poles of i, u and pd
+        return np.roots(self.impedance_numerator) * self.w0
+
+    def resonances(self):
+        # Returns the resonances of zin, one per pole pair, as a list of dicts with
+        # 'frequency_hz' (natural frequency) and 'q', lowest first
+        poles = self.poles()
+        resonances = []
+        for pole in poles[(poles.imag > 0) & (poles.real < 0)]:
+            magnitude = abs(pole)
+            resonances.append({'frequency_hz': float(magnitude / (2 * math.pi)), 'q': float(magnitude / (-2 * pole.real))})
+        return sorted(resonances, key=lambda resonance: resonance['frequency_hz'])
+
+    def impedance_extrema(self, start_freq=0.0, stop_freq=math.inf):
+        # Finds every local peak and dip of |zin| between start_freq and stop_freq exactly: they are
+        # the real roots of d(|Z|^2 / |T|^2)/dw, itself a polynomial in w.
+        # Returns: (peaks, dips), each a list of (frequency_hz, |zin|) in frequency order
+        numerator = _squared_magnitude(self.impedance_numerator)
+        denominator = _squared_magnitude(self.impedance_denominator)
+        slope = np.polysub(np.polymul(np.polyder(numerator), denominator),
+                           np.polymul(numerator, np.polyder(denominator)))
+        curvature = np.polyder(slope)
+
+        peaks, dips = [], []
+        for root in np.roots(np.trim_zeros(slope, 'f')):
+            if abs(root.imag) > 1e-9 * max(abs(root), 1.0) or root.real <= 0:
+                continue
+            frequency = float(root.real * self.w0 / (2 * math.pi))
+            if not start_freq <= frequency <= stop_freq:
+                continue
+            point = (frequency, float(np.abs(self.impedance(frequency))))
+            # |zin| rises before a peak and falls after it, so the slope falls through zero
+            (peaks if np.polyval(curvature, root.real) < 0 else dips).append(point)
+        return sorted(peaks), sorted(dips)
+
+
+def _squared_magnitude(coefficients):
+    # For a real polynomial p (in s/w0), returns the real polynomial |p(jx)|^2 in x
+    powers = np.arange(len(coefficients) - 1, -1, -1)
+    on_axis = coefficients * 1j ** powers
+    return np.polyadd(np.polymul(on_axis.real, on_axis.real), np.polymul(on_axis.imag, on_axis.imag))
+
+
+# ----
+# Sweep Result Cache
+# ----
+
+# Maximum number of sweeps kept before the least recently used one is dropped
+SWEEP_CACHE_MAX_ENTRIES = 16
+_sweep_cache = OrderedDict()
+# Sweeps may run on worker threads, so cache updates are locked
+_sweep_cache_lock = threading.Lock()
+
+# Points evaluated between cancellation checks in a cancellable sweep
+SWEEP_CHUNK_SIZE = 16384
+
+
+class SweepCancelled(Exception):
+    # Raised when a sweep is cancelled part way through
+    pass
+
+
+def calculate_group_delay_ms(frequencies, phase_rad):
+    # Calculates group delay (ms) from the impedance phase of a sweep by numerical differentiation.
+    # PreparedSystem sweeps already carry the exact (analytic) group delay; this is the fallback
+    # for results built from phase data alone and needs a fine grid to be accurate.
+
+    # Need angular frequencies (omega = 2*pi*f)
+    angular_frequencies = 2 * np.pi * frequencies
+
+    # Unwrap phase to handle jumps (e.g., from +pi to -pi)
+    unwrapped_phase = np.unwrap(phase_rad, axis=-1)
+
+    # Numerical derivative of phase w.r.t. angular frequency
+    # np.gradient calculates the gradient using central differences
+    # Use edge_order=2 for potentially better accuracy at edges
+    dphi_domega = np.gradient(unwrapped_phase, angular_frequencies, edge_order=2, axis=-1)
+
+    # Group Delay = -dphi/domega (in seconds), converted to milliseconds
+    return -dphi_domega * 1000
+
+
+# Largest error allowed where the graph draws a straight line between two points of an
+# adaptive sweep. It is measured on log(Zin), so 0.005 is ~0.5% in |Zin| or ~0.3 degrees of phase.
+ADAPTIVE_TOLERANCE = 0.005
+# Points per decade of the log-spaced starting grid
+ADAPTIVE_POINTS_PER_DECADE = 24
+# Refinement passes (each one at most halves the spacing) and total point budget
+ADAPTIVE_MAX_PASSES = 24
+ADAPTIVE_MAX_POINTS = 20000
+
+
+def adaptive_sweep(system, start_freq, stop_freq, tolerance=ADAPTIVE_TOLERANCE,
+                   points_per_decade=ADAPTIVE_POINTS_PER_DECADE, max_points=ADAPTIVE_MAX_POINTS,
+                   cancel_event=None):
+    # Sweeps a PreparedSystem on a non-uniform frequency grid.
+    # Starts from a log-spaced grid, then keeps splitting every interval whose midpoint is not
+    # within tolerance of the straight line between its ends (on log(Zin), so both |Zin| and
+    # phase are checked). Flat stretches stay coarse and the resonances get dense.
+    # A multi-design system shares one grid, split wherever any of its designs needs it.
+    # @param start_freq must be > 0 (the starting grid is logarithmic)
+    # Returns: SweepResult with the points in frequency order
+    if start_freq <= 0:
+        raise ValueError("Adaptive sweeps need a start frequency above 0 Hz")
+    decades = math.log10(stop_freq / start_freq)
+    num_points = max(int(math.ceil(decades * points_per_decade)), 2) + 1
+    frequencies = np.geomspace(start_freq, stop_freq, num=num_points)
+    frequencies[0], frequencies[-1] = start_freq, stop_freq
+    parts = [system.evaluate(frequencies)]
+    total = num_points
+
+    # Intervals still to check, as (left, right) frequency and impedance pairs
+    zin = parts[0].zin
+    left_f, right_f = frequencies[:-1], frequencies[1:]
+    left_z, right_z = zin[..., :-1], zin[..., 1:]
+    for _ in range(ADAPTIVE_MAX_PASSES):
+        if len(left_f) == 0 or total + len(left_f) > max_points:
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            raise SweepCancelled()
+
+        mid_f = 0.5 * (left_f + right_f)
+        mid = system.evaluate(mid_f)
+        parts.append(mid)
+        total += len(mid_f)
+
+        # Distance of the midpoint from the straight line, on log(Zin)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = np.abs(0.5 * np.log(mid.zin ** 2 / (left_z * right_z)))
+        if error.ndim > 1:
+            error = error.max(axis=0)  # worst design (NaN wins)
+        split = ~(error <= tolerance)  # NaN/inf count as not converged
+
+        # Both halves of every interval that failed go to the next pass
+        left_f = np.concatenate([left_f[split], mid_f[split]])
+        right_f = np.concatenate([mid_f[split], right_f[split]])
+        left_z = np.concatenate([left_z[..., split], mid.zin[..., split]], axis=-1)
+        right_z = np.concatenate([mid.zin[..., split], right_z[..., split]], axis=-1)
+
+    return SweepResult.concatenate(parts, sort=True)
+
+
+def get_sweep_results(params, start_freq, stop_freq, step, cancel_event=None):
+    # Returns every graph metric for the given sweep settings.
+    # The sweep only runs on a cache miss; the cache is keyed on the params dict
+    # plus (start_freq, stop_freq, step) and evicts the least recently used entry.
+    # The returned arrays are shared with the cache and are read-only.
+    # @param cancel_event is an optional threading.Event; once it is set the sweep stops at the
+    #  next chunk boundary and raises SweepCancelled
+    key = (params_key(params), start_freq, stop_freq, step)
+    results = _cached_sweep(params, key)
+    if results is not None:
+        return results
+
+    # Create the list of frequencies to test
+    num_steps = int((stop_freq - start_freq) / step) + 1
+    frequencies = np.linspace(start_freq, stop_freq, num=num_steps)
+
+    # One sweep fills every metric
+    with instrumentation.span("sweep", memory=True):
+        system = PreparedSystem(params)
+        if cancel_event is None or num_steps <= SWEEP_CHUNK_SIZE:
+            results = system.evaluate(frequencies)
+        else:
+            parts = []
+            for start in range(0, num_steps, SWEEP_CHUNK_SIZE):
+                if cancel_event.is_set():
+                    raise SweepCancelled()
+                parts.append(system.evaluate(frequencies[start:start + SWEEP_CHUNK_SIZE]))
+            results = SweepResult.concatenate(parts)
+    if cancel_event is not None and cancel_event.is_set():
+        raise SweepCancelled()
+    results.set_read_only()
+    return _store_sweep(key, results)
+
+
+def get_adaptive_sweep_results(params, start_freq, stop_freq, tolerance=ADAPTIVE_TOLERANCE,
+                               cancel_event=None):
+    # Same as get_sweep_results, but on an adaptive grid (see adaptive_sweep) instead of
+    # a fixed step. Shares the cache with the fixed-step sweeps.
+    key = (params_key(params), start_freq, stop_freq, ('adaptive', tolerance))
+    results = _cached_sweep(params, key)
+    if results is not None:
+        return results
+
+    with instrumentation.span("adaptive_sweep", memory=True):
+        results = adaptive_sweep(PreparedSystem(params), start_freq, stop_freq, tolerance=tolerance,
+                                 cancel_event=cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        raise SweepCancelled()
+    results.set_read_only()
+    return _store_sweep(key, results)
+
+
+def stack_designs(params_list):
+    # Combines several params dicts into one whose values are arrays (one entry per design),
+    # so PreparedSystem and the sweeps evaluate them all in a single broadcast pass
+    if not params_list:
+        raise ValueError("No designs to stack")
+    return {key: np.array([params[key] for params in params_list], dtype=float) for key in params_list[0]}
+
+
+def params_key(params):
+    # Hashable cache key for a params dict (design arrays become tuples)
+    return tuple(sorted((name, tuple(np.ravel(value).tolist()) if np.ndim(value) > 0 else value)
+                        for name, value in params.items()))
+
+
+def _cached_sweep(params, key):
+    # Returns the cached sweep for key (or one rescaled from a sweep at another drive level),
+    # or None on a cache miss
+    with _sweep_cache_lock:
+        results = _sweep_cache.get(key)
+        if results is not None:
+            _sweep_cache.move_to_end(key)
+            instrumentation.count("sweep_cache_hit")
+            return results
+        results = _rescale_cached_sweep(params, key)
+    if results is not None:
+        instrumentation.count("sweep_cache_rescaled")
+        return _store_sweep(key, results)
+    instrumentation.count("sweep_cache_miss")
+    return None
+
+
+def _store_sweep(key, results):
+    # Adds a sweep to the cache, evicting the least recently used entries
+    with _sweep_cache_lock:
+        _sweep_cache[key] = results
+        while len(_sweep_cache) > SWEEP_CACHE_MAX_ENTRIES:
+            _sweep_cache.popitem(last=False)
+    return results
+
+
+def _rescale_cached_sweep(params, key):
+    # The model is linear in the drive voltage, so a sweep that differs from a cached one only
+    # in 'vg' is the cached sweep scaled: i, u and pd scale by the voltage ratio, port velocity
+    # and cone excursion by its magnitude, and zin (and so phase and group delay) is unchanged.
+    # Must be called with _sweep_cache_lock held.
+    # Returns: the rescaled SweepResult, or None when no cached sweep qualifies
+    others = tuple(item for item in key[0] if item[0] != 'vg')
+    for cached_key, cached in reversed(_sweep_cache.items()):
+        if cached_key[1:] != key[1:]:
+            continue
+        cached_params = dict(cached_key[0])
+        cached_vg = cached_params.get('vg', 0)
+        if isinstance(cached_vg, tuple) or np.ndim(params['vg']) > 0:
+            continue  # only single-design sweeps are rescaled
+        if cached_vg == 0 or tuple(item for item in cached_key[0] if item[0] != 'vg') != others:
+            continue
+        factor = params['vg'] / cached_vg
+        results = SweepResult(cached.frequency, cached.zin, cached.i * factor, cached.u * factor,
+                              cached.pd * factor, cached.port_velocity_ms * abs(factor),
+                              cached.cone_excursion_mm * abs(factor), cached.fb,
+                              group_delay_ms=cached._group_delay_ms, zin_phase_rad=cached.zin_phase_rad)
+        results.set_read_only()
+        return results
+    return None
+
+
+def clear_sweep_cache():
+    # Drops every cached sweep
+    with _sweep_cache_lock:
+        _sweep_cache.clear()
@@ -0,0 +1,200 @@
+# Window for searching the driver library and loading a driver into the Driver Parameters frame.
+import time
+import tkinter as tk
+import tkinter.messagebox as messagebox
+from tkinter import filedialog, simpledialog, ttk
+import gui_setup.gui_data_manager as data_manager
+
+pad = 5
+
+# Range filters shown in the window: (label, library field, factor from the shown unit to SI)
+_RANGE_FILTERS = (
+    ("Fs (Hz)", 'fs', 1.0),
+    ("Qts", 'qts', 1.0),
+    ("Vas (L)", 'vas', 0.001),
+    ("Re (ohm)", 're', 1.0),
+    ("Bl (Tm)", 'bl', 1.0),
+    ("Sd (cm^2)", 'sd', 0.0001),
+)
+
+# Result columns: (heading, library field, factor from SI to the shown unit, format)
+_COLUMNS = (
+    ("Name", 'name', None, "{}"),
+    ("Manufacturer", 'manufacturer', None, "{}"),
+    ("Fs (Hz)", 'fs', 1.0, "{:.1f}"),
+    ("Qts", 'qts', 1.0, "{:.3f}"),
+    ("Vas (L)", 'vas', 1000.0, "{:.1f}"),
+    ("Re (ohm)", 're', 1.0, "{:.2f}"),
+    ("Bl (Tm)", 'bl', 1.0, "{:.2f}"),
+    ("Sd (cm^2)", 'sd', 10000.0, "{:.1f}"),
+    ("Mms (g)", 'mms', 1000.0, "{:.1f}"),
+    ("Cms (mm/N)", 'cms', 1000.0, "{:.3f}"),
+)
+
+# Most rows shown for one search
+MAX_RESULTS = 1000
+
+
+class DriverBrowser(object):
+    # DriverBrowser opens (or raises) a search window over a DriverLibrary.
+    # Double-clicking a result (or "Load Driver") fills the Driver Parameters frame.
+    # @param root is the main Tk window
+    # @param library is an open driver_library.DriverLibrary
+    # @param on_load is an optional callback run after a driver has been loaded
+    def __init__(self, root, library, on_load=None):
+        self.root = root
+        self.library = library
+        self.on_load = on_load
+        self.window = None
+
+    def show(self):
+        # Opens the window, or brings it to the front if it is already open
+        if self.window is not None:
+            self.window.deiconify()
+            self.window.lift()
+            return
+        self._build()
+        self.search()
+
+    def _build(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Driver Library")
+        self.window.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Filters
+        filter_frame = ttk.Labelframe(self.window, text="Search")
+        filter_frame.grid(column=0, row=0, padx=pad, pady=pad, sticky="ew")
+        ttk.Label(filter_frame, text="Name").grid(column=0, row=0, padx=pad, pady=pad, sticky="e")
+        self.name_entry = ttk.Entry(filter_frame, width=24)
+        self.name_entry.grid(column=1, row=0, columnspan=3, padx=pad, pady=pad, sticky="ew")
+        self.name_entry.bind("<Return>", lambda event: self.search())
+
+        self.range_entries = {}
+        for index, (label, field, _) in enumerate(_RANGE_FILTERS):
+            col = (index % 2) * 4
+            rw = 1 + index // 2
+            ttk.Label(filter_frame, text=label).grid(column=col, row=rw, padx=pad, pady=pad, sticky="e")
+            low = ttk.Entry(filter_frame, width=8)
+            low.grid(column=col + 1, row=rw, padx=(pad, 0), pady=pad)
+            ttk.Label(filter_frame, text="to").grid(column=col + 2, row=rw)
+            high = ttk.Entry(filter_frame, width=8)
+            high.grid(column=col + 3, row=rw, padx=(0, pad), pady=pad)
+            for entry in (low, high):
+                entry.bind("<Return>", lambda event: self.search())
+            self.range_entries[field] = (low, high)
+
+        # Actions
+        action_frame = ttk.Frame(self.window)
+        action_frame.grid(column=0, row=1, padx=pad, sticky="ew")
+        ttk.Button(action_frame, text="Search", command=self.search).pack(side="left", padx=pad)
+        ttk.Button(action_frame, text="Import CSV...", command=self.import_csv).pack(side="left", padx=pad)
+        ttk.Button(action_frame, text="Add Current Driver...", command=self.add_current).pack(side="left", padx=pad)
+        ttk.Button(action_frame, text="Load Driver", command=self.load_selected).pack(side="right", padx=pad)
+
+        # Results
+        result_frame = ttk.Frame(self.window)
+        result_frame.grid(column=0, row=2, padx=pad, pady=pad, sticky="nsew")
+        self.tree = ttk.Treeview(result_frame, columns=[field for _, field, _, _ in _COLUMNS],
+                                 show="headings", height=15, selectmode="browse")
+        for heading, field, factor, _ in _COLUMNS:
+            self.tree.heading(field, text=heading)
+            self.tree.column(field, width=140 if factor is None else 80, anchor="w" if factor is None else "e")
+        scrollbar = ttk.Scrollbar(result_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", lambda event: self.load_selected())
+
+        self.status = ttk.Label(self.window, text="")
+        self.status.grid(column=0, row=3, padx=pad, pady=(0, pad), sticky="w")
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(2, weight=1)
+
+    def _on_close(self):
+        self.window.destroy()
+        self.window = None
+
+    def _read_ranges(self):
+        # Returns the range filters in SI units; raises ValueError naming a bad field
+        ranges = {}
+        for label, field, factor in _RANGE_FILTERS:
+            bounds = []
+            for entry in self.range_entries[field]:
+                text = entry.get().strip()
+                if not text:
+                    bounds.append(None)
+                    continue
+                try:
+                    bounds.append(float(text) * factor)
+                except ValueError:
+                    raise ValueError(f"Invalid number for {label}: '{text}'")
+            if bounds != [None, None]:
+                ranges[field] = tuple(bounds)
+        return ranges
+
+    def search(self):
+        # Runs the search and lists the matches
+        try:
+            ranges = self._read_ranges()
+        except ValueError as e:
+            messagebox.showerror("Search Error", str(e), parent=self.window)
+            return
+
+        start = time.perf_counter()
+        drivers = self.library.search(name=self.name_entry.get().strip() or None, limit=MAX_RESULTS, **ranges)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.tree.delete(*self.tree.get_children())
+        for driver in drivers:
+            self.tree.insert("", "end", iid=str(driver['id']), values=[_format_cell(driver, column) for column in _COLUMNS])
+        more = " (showing the first {})".format(MAX_RESULTS) if len(drivers) == MAX_RESULTS else ""
+        self.status.configure(text=f"{len(drivers)} of {len(self.library)} drivers{more} - {elapsed_ms:.1f} ms")
+
+    def load_selected(self):
+        # Fills the Driver Parameters frame with the selected driver
+        selection = self.tree.selection()
+        if not selection:
+            return
+        driver = self.library.get(int(selection[0]))
+        if driver is None:
+            return
+        data_manager.load_driver(driver)
+        if self.on_load:
+            self.on_load()
+
+    def import_csv(self):
+        path = filedialog.askopenfilename(parent=self.window, title="Import Drivers",
+                                          filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            added = self.library.import_csv(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import Error", f"Could not import drivers: {e}", parent=self.window)
+            return
+        messagebox.showinfo("Import", f"Added {added} drivers.", parent=self.window)
+        self.search()
+
+    def add_current(self):
+        # Stores the driver currently in the Driver Parameters frame
+        if not data_manager.validate_all_inputs():
+            return
+        name = simpledialog.askstring("Add Driver", "Driver name:", parent=self.window)
+        if not name:
+            return
+        try:
+            driver = data_manager.get_driver_values()
+        except ValueError as e:
+            messagebox.showerror("Input Error", f"Could not read the driver parameters: {e}", parent=self.window)
+            return
+        self.library.add_driver(name.strip(), driver)
+        self.search()
+
+
+def _format_cell(driver, column):
+    _, field, factor, text_format = column
+    value = driver[field]
+    if value is None:
+        return ""
+    return text_format.format(value * factor if factor is not None else value)
@@ -0,0 +1,182 @@
+# Local driver (Thiele/Small parameter) library stored in SQLite.
+#
+# Every driver is kept in SI units (the same units as the params dict) together with its
+# derived Fs, Qts and Vas. Each parameter column has its own index, so range searches such
+# as "Fs 20-30 Hz and Qts under 0.4" stay fast with thousands of drivers.
+#
+#   with DriverLibrary() as library:
+#       library.import_csv("drivers.csv")
+#       matches = library.search(fs=(20, 30), qts=(None, 0.4))
+import csv
+import math
+import os
+import sqlite3
+from .inputs import _design_si_units, _model_constants, convert_value
+
+# Where the GUI keeps its library
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".port_tuning_drivers.sqlite3")
+
+# Stored driver parameters (SI units, same keys as the params dict)
+DRIVER_FIELDS = ('re', 'le', 'bl', 'sd', 'cms', 'mms', 'rms')
+# Parameters derived from the stored ones: Fs (Hz), Qts and Vas (m^3)
+DERIVED_FIELDS = ('fs', 'qts', 'vas')
+SEARCH_FIELDS = DRIVER_FIELDS + DERIVED_FIELDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drivers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    manufacturer TEXT NOT NULL DEFAULT '',
+    re REAL NOT NULL, le REAL NOT NULL, bl REAL NOT NULL, sd REAL NOT NULL,
+    cms REAL NOT NULL, mms REAL NOT NULL, rms REAL NOT NULL,
+    fs REAL, qts REAL, vas REAL
+);
+CREATE INDEX IF NOT EXISTS drivers_name ON drivers (name COLLATE NOCASE);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS drivers_{field} ON drivers ({field});\n" for field in SEARCH_FIELDS)
+
+
+def derived_parameters(re, bl, sd, cms, mms, rms):
+    # Returns (fs, qts, vas) in Hz, -, m^3 from SI driver parameters (None where undefined)
+    if mms <= 0 or cms <= 0:
+        return None, None, None
+    fs = 1 / (2 * math.pi * math.sqrt(mms * cms))
+    ws = 2 * math.pi * fs
+    qes = ws * mms * re / bl ** 2 if bl else math.inf
+    qms = ws * mms / rms if rms else math.inf
+    if math.isinf(qes) and math.isinf(qms):
+        qts = None
+    else:
+        qts = 1 / (1 / qes + 1 / qms)
+    vas = _model_constants['p0'] * _model_constants['c'] ** 2 * sd ** 2 * cms
+    return fs, qts, vas
+
+
+def driver_to_design(driver):
+    # Returns the driver as a design dict (test_data.test_values keys, SI units) for the GUI
+    design = {}
+    for field in DRIVER_FIELDS:
+        design[field] = driver[field]
+        design[f"{field}_unit"] = _design_si_units[field]
+    return design
+
+
+class DriverLibrary(object):
+    # DriverLibrary wraps one SQLite file of drivers (created on first use)
+    # @param path is the database file (":memory:" for a throw-away library)
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM drivers").fetchone()[0]
+
+    def add_driver(self, name, driver, manufacturer=""):
+        # Stores one driver. driver holds the DRIVER_FIELDS in SI units (extra keys are ignored).
+        # Returns: the new driver id
+        with self.connection:
+            cursor = self.connection.execute(_INSERT, _driver_row(name, driver, manufacturer))
+        return cursor.lastrowid
+
+    def add_drivers(self, drivers):
+        # Stores many drivers in one transaction. Each dict has 'name', optional 'manufacturer'
+        # and the DRIVER_FIELDS in SI units.
+        # Returns: the number of drivers added
+        rows = (_driver_row(driver['name'], driver, driver.get('manufacturer', "")) for driver in drivers)
+        with self.connection:
+            cursor = self.connection.executemany(_INSERT, rows)
+        return cursor.rowcount
+
+    def import_csv(self, file):
+        # Adds every row of a CSV file (path or open file) of drivers. Columns use the keys and
+        # units of test_data.test_values (e.g. 'cms', 'cms_unit'), plus 'name' and optionally
+        # 'manufacturer'; a missing unit means SI.
+        # Raises ValueError (naming the line) for missing values or unknown units.
+        # Returns: the number of drivers added
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, newline='') as csv_file:
+                return self.import_csv(csv_file)
+        return self.add_drivers(_design_to_driver(row, line)
+                                for line, row in enumerate(csv.DictReader(file), start=2))
+
+    def get(self, driver_id):
+        # Returns the driver as a dict (None if there is no such id)
+        row = self.connection.execute("SELECT * FROM drivers WHERE id = ?", (driver_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def delete(self, driver_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM drivers WHERE id = ?", (driver_id,))
+
+    def search(self, name=None, order_by='name', limit=500, **ranges):
+        # Returns the drivers matching every filter, as dicts.
+        # @param name matches any part of the name or manufacturer (case-insensitive)
+        # @param order_by is 'name' or one of SEARCH_FIELDS
+        # @param ranges are field=(low, high) pairs over SEARCH_FIELDS in SI units; either end
+        #  may be None, e.g. search(fs=(20, 30), qts=(None, 0.4))
+        clauses = []
+        args = []
+        for field, (low, high) in ranges.items():
+            if field not in SEARCH_FIELDS:
+                raise ValueError(f"Unknown search field '{field}'")
+            if low is not None:
+                clauses.append(f"{field} >= ?")
+                args.append(low)
+            if high is not None:
+                clauses.append(f"{field} <= ?")
+                args.append(high)
+        if name:
+            clauses.append("(name LIKE ? OR manufacturer LIKE ?)")
+            args.extend([f"%{name}%"] * 2)
+        if order_by != 'name' and order_by not in SEARCH_FIELDS:
+            raise ValueError(f"Unknown sort field '{order_by}'")
+
+        query = "SELECT * FROM drivers"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY {order_by}" + (" COLLATE NOCASE" if order_by == 'name' else "")
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self.connection.execute(query, args)]
+
+
+_INSERT = ("INSERT INTO drivers (name, manufacturer, " + ", ".join(SEARCH_FIELDS) + ") VALUES ("
+           + ", ".join("?" * (len(SEARCH_FIELDS) + 2)) + ")")
+
+
+def _driver_row(name, driver, manufacturer):
+    # Returns the INSERT values for one driver (derived parameters included)
+    values = [float(driver[field]) for field in DRIVER_FIELDS]
+    re, le, bl, sd, cms, mms, rms = values
+    return (name, manufacturer or "", *values, *derived_parameters(re, bl, sd, cms, mms, rms))
+
+
+def _design_to_driver(row, line):
+    # Converts one CSV row (test_data keys and units) to a driver dict in SI units
+    driver = {'name': (row.get('name') or "").strip() or f"Driver {line}",
+              'manufacturer': (row.get('manufacturer') or "").strip()}
+    for field in DRIVER_FIELDS:
+        raw_value = row.get(field)
+        target_unit = _design_si_units[field]
+        try:
+            value = float(raw_value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Line {line}: invalid or missing value for '{field}'")
+        unit = row.get(f"{field}_unit") or target_unit
+        try:
+            driver[field] = convert_value(value, unit, target_unit, field)
+        except ValueError as e:
+            raise ValueError(f"Line {line}: {e}")
+    return driver
@@ -0,0 +1,333 @@
+# Export of full sweeps to disk (no Tk window needed).
+#
+# Usage:
+#   python -m gui_setup.export -o sweep_out --start 10 --stop 20000 --step 0.01
+#   python -m gui_setup.export designs.csv -o batch_out --start 10 --stop 200 --step 0.1
+#   python -m gui_setup.export -o sweep.csv --start 10 --stop 200 --step 0.01
+#
+# The sweep is evaluated a fixed number of points at a time and every piece is written
+# straight to its place in the .npy files (one per metric, in an output directory), so
+# sweeps of millions of points or many designs at once never have to fit in RAM.
+# open_npy() memory-maps the files back read-only without copying them.
+# CSV and JSON-lines exports stream rows from a generator and write them in blocks, so
+# they start writing straight away and never hold the whole table either.
+import argparse
+import csv
+import json
+import math
+import os
+import itertools
+import sys
+import numpy as np
+from numpy.lib import format as npy_format
+from . import core
+from . import inputs
+from . import test_data
+
+# Arrays written by export_npy, one <name>.npy file each
+NPY_FIELDS = ('frequency', 'zin', 'zin_phase_rad', 'i', 'u', 'pd',
+              'port_velocity_ms', 'cone_excursion_mm', 'group_delay_ms')
+_COMPLEX_FIELDS = ('zin', 'i', 'u', 'pd')
+# Sweep settings and fb are stored next to the arrays
+NPY_METADATA_FILE = 'sweep.json'
+
+# Values (designs x frequencies) evaluated per chunk
+DEFAULT_CHUNK_POINTS = core.SWEEP_CHUNK_SIZE
+
+# Columns of the CSV/JSON-lines exports ('design' is only written for multi-design sweeps)
+TEXT_FIELDS = ('design', 'frequency_hz', 'impedance_ohm', 'phase_deg', 'cone_excursion_mm',
+               'port_velocity_ms', 'group_delay_ms')
+# Rows formatted before each write/flush
+DEFAULT_BUFFER_ROWS = 8192
+
+
+def num_sweep_points(start_freq, stop_freq, step):
+    # Number of points in the Graphs tab frequency grid
+    return int((stop_freq - start_freq) / step) + 1
+
+
+def iter_sweep_chunks(params, start_freq, stop_freq, step, chunk_points=DEFAULT_CHUNK_POINTS,
+                      cancel_event=None):
+    # Yields (rows, first_index, SweepResult) for consecutive pieces of a sweep.
+    # The grid is the same as get_sweep_results uses, but only one piece of it exists at a time.
+    # With several designs (array params values) each piece is either a block of whole design
+    # rows or part of one row, so it always maps to one contiguous run of a (designs x
+    # frequencies) array; rows is the slice of designs covered (None for a single design).
+    # @param chunk_points is the number of values (designs x frequencies) per piece
+    # @param cancel_event is an optional threading.Event checked between pieces
+    num_points = num_sweep_points(start_freq, stop_freq, step)
+    spacing = (stop_freq - start_freq) / (num_points - 1) if num_points > 1 else 0.0
+    points_per_chunk = min(num_points, chunk_points)
+    num_designs = _num_designs(params)
+
+    if num_designs is None:
+        blocks = [(None, core.PreparedSystem(params))]
+    else:
+        rows_per_block = max(chunk_points // num_points, 1)
+        blocks = ((rows, core.PreparedSystem(_select_designs(params, rows)))
+                  for rows in (slice(row, min(row + rows_per_block, num_designs))
+                               for row in range(0, num_designs, rows_per_block)))
+
+    for rows, system in blocks:
+        for first in range(0, num_points, points_per_chunk):
+            if cancel_event is not None and cancel_event.is_set():
+                raise core.SweepCancelled()
+            index = np.arange(first, min(first + points_per_chunk, num_points))
+            frequencies = index * spacing + start_freq
+            if index[-1] == num_points - 1 and num_points > 1:
+                frequencies[-1] = stop_freq  # same end point as np.linspace
+            yield rows, first, system.evaluate(frequencies)
+
+
+def _num_designs(params):
+    # Number of designs when any params value is an array, otherwise None
+    lengths = [len(value) for value in params.values() if np.ndim(value) > 0]
+    return max(lengths) if lengths else None
+
+
+def _select_designs(params, rows):
+    return {key: value[rows] if np.ndim(value) > 0 else value for key, value in params.items()}
+
+
+def export_npy(directory, params, start_freq, stop_freq, step, chunk_points=DEFAULT_CHUNK_POINTS,
+               cancel_event=None):
+    # Sweeps params and writes every NPY_FIELDS array to <directory>/<name>.npy, chunk by chunk.
+    # params values may be arrays (one entry per design); the metric files are then
+    # (designs x frequencies) and frequency.npy stays 1-D.
+    # Each chunk goes straight to its place in the files with plain writes (not through a
+    # writable memory map), so the process never holds more than one chunk.
+    # Returns: the number of frequency points written
+    num_points = num_sweep_points(start_freq, stop_freq, step)
+    num_designs = _num_designs(params)
+    shape = (num_points,) if num_designs is None else (num_designs, num_points)
+
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    try:
+        for name in NPY_FIELDS:
+            dtype = np.dtype(complex if name in _COMPLEX_FIELDS else float)
+            files[name] = _NpyWriter(os.path.join(directory, f"{name}.npy"), dtype,
+                                     (num_points,) if name == 'frequency' else shape)
+
+        fb = []
+        for rows, first, chunk in iter_sweep_chunks(params, start_freq, stop_freq, step, chunk_points,
+                                                    cancel_event):
+            row = 0 if rows is None else rows.start
+            for name, writer in files.items():
+                if name == 'frequency':
+                    if row == 0:
+                        writer.write(first, chunk.frequency)
+                else:
+                    writer.write(row * num_points + first, getattr(chunk, name))
+            if first == 0:
+                fb.append(np.atleast_1d(chunk.fb))
+    finally:
+        for writer in files.values():
+            writer.close()
+
+    fb = np.concatenate(fb)
+    metadata = {
+        'start_freq': start_freq,
+        'stop_freq': stop_freq,
+        'step': step,
+        'num_points': num_points,
+        'num_designs': num_designs,
+        'fb': fb.tolist() if num_designs is not None else fb[0].item(),
+        'fields': list(NPY_FIELDS),
+    }
+    with open(os.path.join(directory, NPY_METADATA_FILE), "w") as meta_file:
+        json.dump(metadata, meta_file, indent=2)
+    return num_points
+
+
+class _NpyWriter(object):
+    # Preallocated .npy file filled in by position
+    # @param path, dtype and shape describe the array file to create
+    def __init__(self, path, dtype, shape):
+        self.dtype = dtype
+        self.file = open(path, "wb")
+        npy_format.write_array_header_1_0(self.file, {'descr': npy_format.dtype_to_descr(dtype),
+                                                      'fortran_order': False, 'shape': shape})
+        self.data_offset = self.file.tell()
+        self.file.truncate(self.data_offset + int(np.prod(shape)) * dtype.itemsize)
+
+    def write(self, first, values):
+        # Writes values (C order) starting at flat element index first
+        self.file.seek(self.data_offset + first * self.dtype.itemsize)
+        self.file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+def iter_result_rows(result, design_labels=None, first_design=0):
+    # Yields one tuple per point of a SweepResult, in TEXT_FIELDS order.
+    # Multi-design results give every point of the first design, then the next, and so on.
+    # @param design_labels optionally names the designs (indexed from 0); otherwise the
+    #  design column holds the design index
+    # @param first_design is the index of the result's first design row
+    if result.num_designs is None:
+        rows = [(None, result)]
+    else:
+        rows = [(first_design + k, result.design(k)) for k in range(result.num_designs)]
+
+    for index, design in rows:
+        label = None if index is None else (design_labels[index] if design_labels else index)
+        columns = zip(design.frequency.tolist(),
+                      design.magnitude().tolist(),
+                      np.degrees(design.zin_phase_rad).tolist(),
+                      design.cone_excursion_mm.tolist(),
+                      design.port_velocity_ms.tolist(),
+                      design.group_delay_ms.tolist())
+        for values in columns:
+            yield (label,) + values
+
+
+def iter_sweep_rows(params, start_freq, stop_freq, step, chunk_points=DEFAULT_CHUNK_POINTS,
+                    cancel_event=None, design_labels=None):
+    # Yields the rows of a whole sweep lazily, evaluating it chunk by chunk (see iter_sweep_chunks)
+    for rows, first, chunk in iter_sweep_chunks(params, start_freq, stop_freq, step, chunk_points,
+                                                cancel_event):
+        yield from iter_result_rows(chunk, design_labels, 0 if rows is None else rows.start)
+
+
+def write_rows(rows, file, output_format, include_design=True, buffer_rows=DEFAULT_BUFFER_ROWS):
+    # Writes rows from iter_result_rows/iter_sweep_rows to an open text file as they arrive,
+    # buffer_rows at a time (the file is flushed after every block).
+    # @param output_format is 'csv' or 'jsonl'
+    # @param include_design writes the design column (leave it out for single-design sweeps)
+    # Returns: the number of rows written
+    fields = TEXT_FIELDS if include_design else TEXT_FIELDS[1:]
+    skip = 0 if include_design else 1
+    writer = None
+    if output_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(fields)
+
+    count = 0
+    while True:
+        block = list(itertools.islice(rows, buffer_rows))
+        if not block:
+            break
+        if writer is not None:
+            writer.writerows(row[skip:] for row in block)
+        else:
+            file.write("".join(json.dumps(dict(zip(fields, (_json_value(value) for value in row[skip:])))) + "\n"
+                               for row in block))
+        file.flush()
+        count += len(block)
+    return count
+
+
+def export_text(path, params, start_freq, stop_freq, step, output_format=None,
+                chunk_points=DEFAULT_CHUNK_POINTS, cancel_event=None, design_labels=None):
+    # Streams a whole sweep of params to a CSV or JSON-lines file ('-' for stdout).
+    # @param output_format is 'csv' or 'jsonl' (defaults to the file extension)
+    # Returns: the number of rows written
+    rows = iter_sweep_rows(params, start_freq, stop_freq, step, chunk_points, cancel_event, design_labels)
+    return _write_text(path, rows, output_format, _num_designs(params) is not None)
+
+
+def export_result_text(path, result, output_format=None):
+    # Writes an already computed SweepResult (e.g. an adaptive sweep) to a CSV or JSON-lines file
+    return _write_text(path, iter_result_rows(result), output_format, result.num_designs is not None)
+
+
+def _write_text(path, rows, output_format, include_design):
+    from .batch import _guess_format
+
+    output_format = output_format or _guess_format(path, 'csv')
+    if path == "-":
+        return write_rows(rows, sys.stdout, output_format, include_design)
+    with open(path, "w", newline='') as out_file:
+        return write_rows(rows, out_file, output_format, include_design)
+
+
+def _json_value(value):
+    # NaN/inf aren't valid JSON; write them as null
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def open_npy(directory):
+    # Maps a directory written by export_npy back as a read-only SweepResult (no copy; pages
+    # are only read from disk when used)
+    with open(os.path.join(directory, NPY_METADATA_FILE)) as meta_file:
+        metadata = json.load(meta_file)
+    arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in NPY_FIELDS}
+    fb = metadata['fb']
+    return core.SweepResult(arrays.pop('frequency'), fb=np.array(fb) if isinstance(fb, list) else fb, **arrays)
+
+
+def read_params(path, input_format):
+    # Returns (params, labels) for every design in a CSV/JSON-lines file: params has each value
+    # stacked into an array (one entry per design) so they are swept together, and labels
+    # holds each design's name (or its position)
+    from .batch import design_params, read_designs
+
+    file = sys.stdin if path == "-" else open(path, newline='')
+    params_list = []
+    labels = []
+    try:
+        for index, design in enumerate(read_designs(file, input_format)):
+            label = design.get('name') or index
+            try:
+                params_list.append(design_params(design))
+            except ValueError as e:
+                raise ValueError(f"Design {label}: {e}")
+            labels.append(label)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    if not params_list:
+        raise ValueError("No designs found")
+    return core.stack_designs(params_list), labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gui_setup.export",
+        description="Sweep a design (or every design in a file) and write the full results to disk.")
+    parser.add_argument("input", nargs="?",
+                        help="CSV or JSON-lines file of designs (default: the test_data design)")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output directory for the .npy files, or a .csv/.jsonl file ('-' for stdout)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Defaults to the input file extension")
+    parser.add_argument("--format", choices=("npy", "csv", "jsonl"),
+                        help="Output format (defaults to the output extension, npy for anything else)")
+    parser.add_argument("--start", type=float, default=10, help="Start frequency in Hz (default 10)")
+    parser.add_argument("--stop", type=float, default=120, help="Stop frequency in Hz (default 120)")
+    parser.add_argument("--step", type=float, default=0.5, help="Frequency step in Hz (default 0.5)")
+    parser.add_argument("--chunk-points", type=int, default=DEFAULT_CHUNK_POINTS,
+                        help=f"Values evaluated per chunk (default {DEFAULT_CHUNK_POINTS})")
+    args = parser.parse_args(argv)
+
+    if args.step <= 0 or args.stop <= args.start or args.start < 0:
+        parser.error("frequency range must satisfy 0 <= start < stop and step > 0")
+    if args.chunk_points < 1:
+        parser.error("--chunk-points must be at least 1")
+
+    from .batch import _guess_format
+
+    try:
+        if args.input:
+            params, labels = read_params(args.input, args.input_format or _guess_format(args.input, 'csv'))
+        else:
+            params, labels = inputs.design_to_params(test_data.test_values), None
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    output_format = args.format or _guess_format(args.output, 'npy')
+    if output_format == 'npy':
+        num_points = export_npy(args.output, params, args.start, args.stop, args.step, args.chunk_points)
+        print(f"Wrote {num_points} points to {args.output}", file=sys.stderr)
+    else:
+        num_rows = export_text(args.output, params, args.start, args.stop, args.step, output_format,
+                               args.chunk_points, design_labels=labels)
+        print(f"Wrote {num_rows} rows to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
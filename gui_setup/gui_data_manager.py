@@ -1,53 +1,29 @@
 # Creating this file to handle the storing/retrieving of GUI objects.
 import math
+import numpy as np
 import tkinter.messagebox as messagebox
 #this import is used for setting test data and can be removed/commented out when not needed
 from . import test_data
 from . import computations as computations
+from . import tolerance
+from .driver_library import DRIVER_FIELDS, driver_to_design
+from .inputs import (
+    _end_correction_factors,
+    DEFAULT_END_CORRECTION,
+    _model_constants,
+    _design_si_units,
+    convert_value,
+    apply_vc_configuration,
+)
 import tkinter as tk
 
 _gui_items = {}
+# Designs saved for comparison on the graph, as (name, params) pairs
+_saved_designs = []
 
-# Target base units: m, m^2, m^3, H, Kg, N/A (for factors like Bl, Rms, Re)
-_conversion_factors = {
-    # Length (target: m)
-    "m": 1.0,
-    "cm": 0.01,
-    "mm": 0.001,
-    "in": 0.0254,
-    "ft": 0.3048,
-    # Area (target: m^2)
-    "m^2": 1.0,
-    "cm^2": 0.0001,
-    "mm^2": 0.000001,
-    "in^2": 0.00064516, # 1 / 1550.003
-    "ft^2": 0.092903,   # 1 / 10.7639
-    # Volume (target: m^3)
-    "m^3": 1.0,
-    "L": 0.001,
-    "cm^3": 0.000001,
-    "mm^3": 1e-9,
-    "in^3": 1.63871e-5, # 1 / 61023.7
-    "ft^3": 0.0283168,  # 1 / 35.3147
-    # Inductance (target: H)
-    "H": 1.0,
-    "mH": 0.001,
-    # Mass (target: Kg)
-    "Kg": 1.0,
-    "g": 0.001,
-    # Compliance (target: m/N)
-    "m/N": 1.0,
-    "mm/N": 0.001,
-    "um/N": 0.000001,
-    # Resistance/Force/Impedance (target: N/A - factor is 1.0)
-    "Kg/s": 1.0,
-    "Ns/s": 1.0, # Assuming Ns/m or Rayls? Standard is Kg/s. Let's keep 1.0
-    "Tm": 1.0,
-    "N/A": 1.0,
-    "ohm": 1.0,
-    "V": 1.0, # Keeping Vg as voltage for now
-    "W": 1.0, # If Vg is treated as power, factor is still 1
-}
+DEFAULT_TOLERANCE_PERCENT = 10.0
+# Most frequencies the tolerance band is computed at (the sweep grid is thinned beyond this)
+TOLERANCE_MAX_POINTS = 1000
 
 def convert_to_si(item_name, target_si_unit):
     #Converts the value of a registered GUI item to the specified SI base unit.
@@ -63,7 +39,6 @@ def convert_to_si(item_name, target_si_unit):
     #    ValueError: If item not found, unit unknown, or value invalid.
 
     global _gui_items
-    global _conversion_factors
 
     item_obj = _gui_items.get(item_name)
     if not item_obj:
@@ -107,15 +82,7 @@ def convert_to_si(item_name, target_si_unit):
     if not current_unit:
         raise ValueError(f"Unit for item '{item_name}' is missing or empty. Check get_current_unit() or widget setup.")
 
-    factor = _conversion_factors.get(current_unit)
-
-    if factor is None:
-        raise ValueError(f"Unknown unit '{current_unit}' for item '{item_name}'. Check _conversion_factors dict.")
-
-    target_factor = _conversion_factors.get(target_si_unit, 1.0)
-    converted_value = (value * factor) / target_factor
-
-    return converted_value
+    return convert_value(value, current_unit, target_si_unit, item_name)
 
 def register_item(name, item_object):
     # Registers a GUI Item object in the central dictionary
@@ -128,8 +95,9 @@ def register_item(name, item_object):
         global __graph_canvas # Keep this one if direct access is preferred
         __graph_canvas = item_object
 
-def validate_all_inputs():
+def validate_all_inputs(show_errors=True):
     # Checks the 'is_valid' status of all required numeric Item objects
+    # @param show_errors pops up a message box listing the invalid fields (off for live updates)
     global _gui_items
     invalid_fields = []
     all_valid = True
@@ -154,13 +122,32 @@ def validate_all_inputs():
              invalid_fields.append(f"{item_name} (Missing)")
 
 
-    if not all_valid:
+    if not all_valid and show_errors:
         error_message = "Invalid or missing input in the following fields:\n\n"
         error_message += "\n".join(f"- {name}" for name in invalid_fields)
         messagebox.showerror("Input Error", error_message)
 
     return all_valid
 
+def bind_edit_listener(callback):
+    # Calls callback(item_name) whenever the user edits one of the registered inputs
+    # (typing in an Entry, cycling a unit button, picking a combobox value or a VC radio button).
+    # Call this once every item has been registered.
+    for name, item_obj in _gui_items.items():
+        if isinstance(item_obj, tk.Variable):
+            item_obj.trace_add("write", lambda *args, n=name: callback(n))
+            continue
+
+        txt_field = getattr(item_obj, 'txtField', None)
+        if isinstance(txt_field, tk.Entry) and txt_field.cget('state') != 'readonly':
+            txt_field.bind("<KeyRelease>", lambda event, n=name: callback(n), add="+")
+
+        widget_type = getattr(item_obj, '_unit_widget_type', None)
+        if widget_type == 'button':
+            item_obj.button.btn.bind("<ButtonRelease-1>", lambda event, n=name: callback(n), add="+")
+        elif widget_type == 'cmb':
+            item_obj.cmb.cmb.bind("<<ComboboxSelected>>", lambda event, n=name: callback(n), add="+")
+
 def get_vc_type():
     var_obj = _gui_items.get("vc_type")
     if var_obj and isinstance(var_obj, tk.StringVar):
@@ -200,6 +187,40 @@ def get_graph_step():
             return 1.0  # Default if invalid
     return 1.0  # Default if object doesn't exist
 
+def get_graph_frequencies(max_points=None):
+    # Returns the graph's fixed-step frequency grid, spread over at most max_points if given
+    start_freq = get_start_freq()
+    stop_freq = get_stop_freq()
+    num_steps = int((stop_freq - start_freq) / get_graph_step()) + 1
+    if max_points is not None:
+        num_steps = min(num_steps, max_points)
+    return np.linspace(start_freq, stop_freq, num=num_steps)
+
+def get_adaptive_sweep():
+    # True when the graph should use an adaptive frequency grid instead of the fixed step
+    var_obj = _gui_items.get("adaptive_sweep")
+    if var_obj and isinstance(var_obj, tk.BooleanVar):
+        return var_obj.get()
+    return False
+
+def get_tolerance_analysis():
+    # True when the graph should shade a Monte Carlo tolerance band
+    var_obj = _gui_items.get("tolerance_analysis")
+    if var_obj and isinstance(var_obj, tk.BooleanVar):
+        return var_obj.get()
+    return False
+
+def get_tolerance_percent():
+    # Returns the +/- spread (percent) applied to Cms, Mms, Bl and Re in the tolerance analysis
+    var_obj = _gui_items.get("tolerance_percent")
+    if var_obj:
+        try:
+            percent = float(var_obj.get())
+            return percent if 0 <= percent < 100 else DEFAULT_TOLERANCE_PERCENT
+        except ValueError:
+            return DEFAULT_TOLERANCE_PERCENT
+    return DEFAULT_TOLERANCE_PERCENT
+
 def get_port_tuning_hz():
     # This is a placeholder.
     # The port_tuning_calculation itself should be
@@ -216,21 +237,7 @@ def get_end_correction():
     item_obj = _gui_items.get("end_correction")
     if not item_obj: raise ValueError("End Correction item not registered.")
     value = item_obj.get_cmb()
-    # (Rest of the end correction logic remains the same)
-    if value == '3 Common Walls':
-        return 2.227
-    elif value == '2 Common Walls':
-        return 1.728
-    elif value == '1 Common Wall':
-        return 1.23
-    elif value == 'One Flanged End':
-        return 0.732
-    elif value == 'Both Flanged Ends':
-        return 0.85
-    elif value == 'Both Free Ends':
-        return 0.614
-    else:
-        return 0.823  # Default or handle error
+    return _end_correction_factors.get(value, DEFAULT_END_CORRECTION)  # Default or handle error
 
 def get_number_of_ports():
     item_obj = _gui_items.get("number_of_ports")
@@ -248,6 +255,10 @@ def get_graph_canvas():
     # Returns the main Matplotlib canvas object
     return _gui_items.get("graph_canvas")
 
+def get_sweep_worker():
+    # Returns the background SweepWorker (None if it wasn't registered)
+    return _gui_items.get("sweep_worker")
+
 def get_start_freq():
     item_obj = _gui_items.get("start_freq")
     if item_obj:
@@ -290,17 +301,9 @@ def gather_all_inputs():
         bl_base = get_bl_base()
 
         # --- Calculate EFFECTIVE Re, Le, Bl ---
-        re_eff, le_eff, bl_eff = re_base, le_base, bl_base # Start with base values
+        re_eff, le_eff, bl_eff = apply_vc_configuration(re_base, le_base, bl_base, vc_type, vc_wiring)
 
         if vc_type == "Dual VC":
-            if vc_wiring == "Series":
-                re_eff = re_base * 2
-                le_eff = le_base * 2
-                bl_eff = bl_base * 2
-            elif vc_wiring == "Parallel":
-                re_eff = re_base / 2
-                le_eff = le_base / 2
-                bl_eff = bl_base # Remains the same for parallel impedance calc
             print(f"Dual VC ({vc_wiring}): Re={re_eff:.3f}, Le={le_eff:.4f}, Bl={bl_eff:.2f}") # Debug print
         # --------------------------------------
 
@@ -316,7 +319,7 @@ def gather_all_inputs():
             'rms': convert_to_si('rms', 'Kg/s'), # Assuming get_rms returns SI directly now
             'vg': convert_to_si('vg', 'V'),
 
-            'ql': 10, 'p0': 1.18, 'c': 343.68, # Constants
+            **_model_constants, # Constants
 
             'vb': convert_to_si('net_volume', 'm^3'),
             'number_of_ports': get_number_of_ports(),
@@ -331,6 +334,98 @@ def gather_all_inputs():
         messagebox.showerror("Error", f"Failed to gather inputs: {e}")
         raise
 
+def save_design(name, params):
+    # Keeps a copy of params to overlay on the graph under name (replacing a design of the same name)
+    delete_saved_design(name)
+    _saved_designs.append((name, dict(params)))
+
+def delete_saved_design(name):
+    _saved_designs[:] = [(saved_name, params) for saved_name, params in _saved_designs if saved_name != name]
+
+def clear_saved_designs():
+    _saved_designs.clear()
+
+def get_saved_designs():
+    # Returns the saved designs as a list of (name, params) pairs, oldest first
+    return list(_saved_designs)
+
+def _graph_key(params):
+    # Everything the graph depends on apart from the graph type: the inputs, the saved designs,
+    # the sweep range and the tolerance settings
+    sweep = ('adaptive',) if get_adaptive_sweep() else ('step', get_graph_step())
+    return (computations.params_key(params),
+            tuple((name, computations.params_key(saved)) for name, saved in _saved_designs),
+            get_start_freq(), get_stop_freq(), sweep,
+            get_tolerance_percent() if get_tolerance_analysis() else None)
+
+def is_graph_current(params):
+    # True when the graph was last drawn from params with the current graph settings, so
+    # another graph type can be drawn from the sweep kept on the canvas
+    canvas = get_graph_canvas()
+    return canvas is not None and getattr(canvas, 'graph_key', None) == _graph_key(params)
+
+def request_graph_update(params, on_error=None):
+    # Sweeps the current graph settings and redraws the graph.
+    # With a registered sweep worker the sweep runs in the background and a newer request
+    # supersedes this one; the graph type is read when the sweep is done, so a change made
+    # while it runs is honoured. Without a worker it runs synchronously.
+    # Saved designs are stacked behind params and swept with it in one pass, then overlaid.
+    # With tolerance analysis on, the same job also runs the Monte Carlo band of params.
+    # @param on_error is called with the exception if the sweep or the drawing fails
+    canvas = get_graph_canvas()
+    if not canvas:
+        print("Error: Graph canvas not found.")
+        return
+    graph_key = _graph_key(params)
+    tolerance_params = params if get_tolerance_analysis() else None
+    spread = get_tolerance_percent() / 100
+    labels = None
+    if _saved_designs:
+        labels = ["Current"] + [name for name, _ in _saved_designs]
+        params = computations.stack_designs([params] + [saved for _, saved in _saved_designs])
+    start_freq = get_start_freq()
+    stop_freq = get_stop_freq()
+    if get_adaptive_sweep():
+        sweep, sweep_args = computations.get_adaptive_sweep_results, (params, start_freq, stop_freq)
+    else:
+        sweep, sweep_args = computations.get_sweep_results, (params, start_freq, stop_freq, get_graph_step())
+
+    def job(cancel_event=None):
+        results = sweep(*sweep_args, cancel_event=cancel_event)
+        tolerance_results = None
+        if tolerance_params is not None:
+            frequencies = results.frequency
+            if len(frequencies) > TOLERANCE_MAX_POINTS:
+                frequencies = np.linspace(frequencies[0], frequencies[-1], num=TOLERANCE_MAX_POINTS)
+            tolerance_results = tolerance.run_tolerance_analysis(
+                tolerance_params, frequencies, tolerances=dict.fromkeys(tolerance.DEFAULT_TOLERANCES, spread),
+                cancel_event=cancel_event)
+        return results, tolerance_results
+
+    def on_done(outcome):
+        results, tolerance_results = outcome
+        try:
+            computations.draw_sweep_results(canvas, results, get_selected_graph_type(), labels, tolerance_results)
+            canvas.graph_key = graph_key
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                raise
+
+    worker = get_sweep_worker()
+    if worker is None:
+        try:
+            outcome = job()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+                return
+            raise
+        on_done(outcome)
+    else:
+        worker.submit(job, on_done=on_done, on_error=on_error)
+
 def set_port_tuning_output(value):
     # Sets the read-only Port Tuning field with proper formatting."""
     item_obj = _gui_items.get("port_tuning")
@@ -340,6 +435,24 @@ def set_port_tuning_output(value):
         else:
              item_obj.set_output_text(str(value)) # Show error messages etc.
 
+def get_driver_values():
+    # Returns the Driver Parameters frame as a dict of SI values (base voice coil values,
+    # before any dual VC adjustment), as stored in the driver library
+    return {field: convert_to_si(field, _design_si_units[field]) for field in DRIVER_FIELDS}
+
+def load_driver(driver):
+    # Fills the Driver Parameters frame with a driver library entry (SI units)
+    # and switches each unit button to the matching SI unit.
+    design = driver_to_design(driver)
+    for field in DRIVER_FIELDS:
+        item_obj = _gui_items.get(field)
+        if not item_obj:
+            continue
+        item_obj.set_input_text(f"{design[field]:.6g}")
+        if getattr(item_obj, '_unit_widget_type', None) == 'button':
+            item_obj.set_btn_text(design[f"{field}_unit"])
+    print(f"Loaded driver: {driver.get('name', '')}")
+
 # This function is used for setting test data. Can be removed when no longer needed
 def load_test_values():
     # Loads all test values from the test_data module
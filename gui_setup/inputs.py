@@ -0,0 +1,143 @@
+# Plain-data side of the inputs: the unit conversion table and building the params dict
+# from a design without any GUI. gui_data_manager uses these for the widgets; headless
+# tools (batch CLI, solvers) can use them directly without importing tkinter.
+
+# Target base units: m, m^2, m^3, H, Kg, N/A (for factors like Bl, Rms, Re)
+_conversion_factors = {
+    # Length (target: m)
+    "m": 1.0,
+    "cm": 0.01,
+    "mm": 0.001,
+    "in": 0.0254,
+    "ft": 0.3048,
+    # Area (target: m^2)
+    "m^2": 1.0,
+    "cm^2": 0.0001,
+    "mm^2": 0.000001,
+    "in^2": 0.00064516, # 1 / 1550.003
+    "ft^2": 0.092903,   # 1 / 10.7639
+    # Volume (target: m^3)
+    "m^3": 1.0,
+    "L": 0.001,
+    "cm^3": 0.000001,
+    "mm^3": 1e-9,
+    "in^3": 1.63871e-5, # 1 / 61023.7
+    "ft^3": 0.0283168,  # 1 / 35.3147
+    # Inductance (target: H)
+    "H": 1.0,
+    "mH": 0.001,
+    # Mass (target: Kg)
+    "Kg": 1.0,
+    "g": 0.001,
+    # Compliance (target: m/N)
+    "m/N": 1.0,
+    "mm/N": 0.001,
+    "um/N": 0.000001,
+    # Resistance/Force/Impedance (target: N/A - factor is 1.0)
+    "Kg/s": 1.0,
+    "Ns/s": 1.0, # Assuming Ns/m or Rayls? Standard is Kg/s. Let's keep 1.0
+    "Tm": 1.0,
+    "N/A": 1.0,
+    "ohm": 1.0,
+    "V": 1.0, # Keeping Vg as voltage for now
+    "W": 1.0, # If Vg is treated as power, factor is still 1
+}
+
+# End correction factor for each "End Correction" combobox choice
+_end_correction_factors = {
+    '3 Common Walls': 2.227,
+    '2 Common Walls': 1.728,
+    '1 Common Wall': 1.23,
+    'One Flanged End': 0.732,
+    'Both Flanged Ends': 0.85,
+    'Both Free Ends': 0.614,
+}
+DEFAULT_END_CORRECTION = 0.823
+
+# Fixed model constants (leak losses, air density, speed of sound)
+_model_constants = {'ql': 10, 'p0': 1.18, 'c': 343.68}
+
+# SI target unit for each design value (keys match test_data.test_values)
+_design_si_units = {
+    're': 'ohm',
+    'le': 'H',
+    'bl': 'Tm',
+    'sd': 'm^2',
+    'cms': 'm/N',
+    'mms': 'Kg',
+    'rms': 'Kg/s',
+    'vg': 'V',
+    'vb': 'm^3',
+    'port_area': 'm^2',
+    'port_length': 'm',
+}
+
+def convert_value(value, unit, target_si_unit, name="value"):
+    # Converts a plain number from the given unit to the target SI unit using _conversion_factors.
+    # Raises ValueError if the unit is unknown.
+    factor = _conversion_factors.get(unit)
+    if factor is None:
+        raise ValueError(f"Unknown unit '{unit}' for item '{name}'. Check _conversion_factors dict.")
+    target_factor = _conversion_factors.get(target_si_unit, 1.0)
+    return (value * factor) / target_factor
+
+def apply_vc_configuration(re_base, le_base, bl_base, vc_type, vc_wiring):
+    # Returns the effective (Re, Le, Bl) for the voice coil type and wiring
+    if vc_type == "Dual VC":
+        if vc_wiring == "Series":
+            return re_base * 2, le_base * 2, bl_base * 2
+        elif vc_wiring == "Parallel":
+            return re_base / 2, le_base / 2, bl_base # Bl remains the same for parallel impedance calc
+    return re_base, le_base, bl_base
+
+def design_to_params(design):
+    # Builds the same params dict as gather_all_inputs() without any GUI.
+    # @param design is a dict using the keys and units of test_data.test_values
+    # (e.g. 'cms': 0.46, 'cms_unit': 'mm/N'). Values may be numbers or numeric strings,
+    # a missing unit means the value is already in SI units.
+    # Raises ValueError for missing/invalid values or unknown units.
+    si = {}
+    for key, target_unit in _design_si_units.items():
+        raw_value = design.get(key)
+        if raw_value is None or raw_value == '':
+            raise ValueError(f"Missing value for '{key}'")
+        try:
+            value = float(raw_value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid numeric value for {key}")
+        unit = design.get(f"{key}_unit") or target_unit
+        si[key] = convert_value(value, unit, target_unit, key)
+
+    end_correction = design.get('end_correction') or 'One Flanged End'
+    if end_correction in _end_correction_factors:
+        end_correction = _end_correction_factors[end_correction]
+    else:
+        try:
+            end_correction = float(end_correction)
+        except (TypeError, ValueError):
+            raise ValueError(f"Unknown end correction '{end_correction}'")
+
+    try:
+        number_of_ports = int(float(design.get('number_of_ports') or 1))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid numeric value for number_of_ports")
+
+    re_eff, le_eff, bl_eff = apply_vc_configuration(si['re'], si['le'], si['bl'],
+                                                    design.get('vc_type') or "Single VC",
+                                                    design.get('vc_wiring') or "Series")
+    return {
+        're': re_eff,
+        'le': le_eff,
+        'bl': bl_eff,
+        'sd': si['sd'],
+        'cms': si['cms'],
+        'mms': si['mms'],
+        'rms': si['rms'],
+        'vg': si['vg'],
+        **_model_constants,
+        'vb': si['vb'],
+        'number_of_ports': number_of_ports if number_of_ports > 0 else 1,
+        'end_correction': end_correction,
+        'port_length_m': si['port_length'],
+        'port_area_m2': si['port_area'],
+    }
@@ -0,0 +1,179 @@
+# Lightweight timing instrumentation for the update pipeline.
+#
+# Wrap a stage in a span and it is timed, counted and added to a rolling in-memory log:
+#
+#   with instrumentation.span("gather_inputs"):
+#       params = data_manager.gather_all_inputs()
+#
+# Spans are off by default; span() then hands back a shared do-nothing object, so the cost
+# is one function call and one flag check. Turn them on with enable() or by starting the
+# program with PORT_TUNING_PROFILE set: "1" just records, any other value is a file the log
+# is written to on exit. PORT_TUNING_PROFILE_MEMORY=1 also records the tracemalloc peak of
+# spans opened with memory=True (the sweeps).
+import atexit
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Entries kept in the rolling log (older ones are dropped)
+LOG_MAX_ENTRIES = 2000
+
+_enabled = False
+_trace_memory = False
+_log = deque(maxlen=LOG_MAX_ENTRIES)
+_totals = {}  # name -> [count, total_s, max_s]
+_lock = threading.Lock()
+
+
+class _NullSpan(object):
+    # Returned by span() while instrumentation is disabled
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    # Times one run of a stage and records it when the block exits
+    # @param name is the stage name shown in the log
+    # @param memory also records the tracemalloc peak (KiB) during the span when memory tracing is on
+    __slots__ = ('name', 'memory', 'start')
+
+    def __init__(self, name, memory):
+        self.name = name
+        self.memory = memory and _trace_memory
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024 if self.memory else None
+        _record(self.name, duration, peak_kib, failed=exc_type is not None)
+        return False
+
+
+def span(name, memory=False):
+    # Returns a context manager timing the enclosed block as stage name
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, memory)
+
+
+def count(name):
+    # Counts an event that has no duration (e.g. a cache hit); it shows in summary() only
+    if not _enabled:
+        return
+    with _lock:
+        _totals.setdefault(name, [0, 0.0, 0.0])[0] += 1
+
+
+def _record(name, duration, peak_kib, failed):
+    entry = {
+        'time': time.time(),
+        'stage': name,
+        'ms': duration * 1000,
+        'thread': threading.current_thread().name,
+    }
+    if peak_kib is not None:
+        entry['peak_kib'] = peak_kib
+    if failed:
+        entry['failed'] = True
+    with _lock:
+        _log.append(entry)
+        totals = _totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] = max(totals[2], duration)
+
+
+def enable(trace_memory=False):
+    # Starts recording spans; trace_memory also starts tracemalloc for memory=True spans
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    # Stops recording (the log is kept until reset())
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    # Clears the log and the per-stage totals
+    with _lock:
+        _log.clear()
+        _totals.clear()
+
+
+def entries():
+    # Returns a copy of the rolling log (oldest first)
+    with _lock:
+        return list(_log)
+
+
+def summary():
+    # Returns: dict of stage name -> {'count', 'total_ms', 'mean_ms', 'max_ms'} since the last reset
+    with _lock:
+        return {name: {'count': calls,
+                       'total_ms': total * 1000,
+                       'mean_ms': total * 1000 / calls,
+                       'max_ms': longest * 1000}
+                for name, (calls, total, longest) in _totals.items()}
+
+
+def format_report():
+    # Returns the per-stage summary followed by the rolling log as plain text
+    lines = [f"{'stage':<28} {'count':>7} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+    for name, stats in sorted(summary().items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:<28} {stats['count']:>7} {stats['total_ms']:>11.2f} "
+                     f"{stats['mean_ms']:>10.2f} {stats['max_ms']:>10.2f}")
+    lines.append("")
+    for entry in entries():
+        stamp = time.strftime('%H:%M:%S', time.localtime(entry['time'])) + f".{int(entry['time'] % 1 * 1000):03d}"
+        line = f"{stamp} {entry['thread']:<12} {entry['stage']:<28} {entry['ms']:10.2f} ms"
+        if 'peak_kib' in entry:
+            line += f"  peak {entry['peak_kib']:.0f} KiB"
+        if entry.get('failed'):
+            line += "  (failed)"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    # Writes format_report() to path
+    with open(path, "w") as out_file:
+        out_file.write(format_report())
+
+
+def _enable_from_environment():
+    setting = os.environ.get("PORT_TUNING_PROFILE")
+    if not setting or setting == "0":
+        return
+    enable(trace_memory=os.environ.get("PORT_TUNING_PROFILE_MEMORY") == "1")
+    if setting != "1":
+        atexit.register(dump, setting)
+
+
+_enable_from_environment()
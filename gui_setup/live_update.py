@@ -0,0 +1,48 @@
+# Debounced "live" recompute: waits until input edits settle before refreshing the results.
+
+# Inputs that feed the port tuning (fb); edits to anything else leave fb unchanged
+TUNING_FIELDS = frozenset({"net_volume", "port_area", "port_length", "number_of_ports", "end_correction"})
+
+DEFAULT_DELAY_MS = 300
+
+
+class LiveUpdater(object):
+    # LiveUpdater collects the names of edited inputs and calls refresh(changed_names) once no
+    # edit has happened for delay_ms. Every new edit restarts the wait, so typing a number
+    # produces one refresh rather than one per key.
+    # @param root is the Tk window used for after() scheduling
+    # @param refresh is called with the set of item names edited since the last refresh
+    # @param delay_ms is the debounce interval in milliseconds
+    def __init__(self, root, refresh, delay_ms=DEFAULT_DELAY_MS):
+        self.root = root
+        self.refresh = refresh
+        self.delay_ms = delay_ms
+        self.enabled = False
+        self._changed = set()
+        self._after_id = None
+
+    def set_enabled(self, enabled):
+        # Turns live mode on/off; turning it off drops any pending refresh
+        self.enabled = enabled
+        if not enabled:
+            self._cancel_pending()
+            self._changed.clear()
+
+    def notify(self, item_name):
+        # Records an edit and (re)starts the debounce timer
+        if not self.enabled:
+            return
+        self._changed.add(item_name)
+        self._cancel_pending()
+        self._after_id = self.root.after(self.delay_ms, self._fire)
+
+    def _cancel_pending(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self):
+        self._after_id = None
+        changed = self._changed
+        self._changed = set()
+        self.refresh(changed)
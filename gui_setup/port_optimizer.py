@@ -0,0 +1,106 @@
+# Design-space search for port geometry.
+#
+# Builds a grid of candidate boxes (port area x number of ports x net volume), solves the port
+# length that hits the target tuning for each one, then runs every candidate over the passband
+# in broadcast (designs x frequencies) blocks. Candidates whose peak port velocity or cone
+# excursion go over the limits are dropped, and the Pareto-best of the rest are returned.
+import itertools
+import numpy as np
+from . import core
+from . import tuning_solver
+
+# Candidates evaluated per broadcast pass (keeps the designs x frequencies arrays small)
+DEFAULT_BLOCK_SIZE = 2048
+
+# Objectives used for the Pareto front (all minimized)
+PARETO_OBJECTIVES = ('vb', 'port_length_m', 'peak_port_velocity_ms', 'peak_cone_excursion_mm')
+
+
+def optimize_port_geometry(params, target_fb, max_port_velocity, max_cone_excursion,
+                           frequencies=None, port_areas=None, port_counts=(1, 2, 3, 4),
+                           net_volumes=None, max_port_length=None, block_size=DEFAULT_BLOCK_SIZE):
+    # Searches port area, number of ports and net volume for designs tuned to target_fb that
+    # stay under the port velocity (m/s) and cone excursion (mm) limits across the passband.
+    # @param params is the params dict of the driver (and default box) in SI units
+    # @param frequencies is the passband to check (defaults to 10-120 Hz in 0.5 Hz steps)
+    # @param port_areas are the port areas to try in m^2, same meaning as params['port_area_m2']
+    #  (defaults to 5-500 cm^2)
+    # @param port_counts are the numbers of ports to try
+    # @param net_volumes are the net volumes to try in m^3 (defaults to 0.5x-2x params['vb'])
+    # @param max_port_length optionally drops designs needing longer ports (m)
+    # Returns: List of dicts (one per Pareto-best design) sorted by net volume, with the keys
+    #  'port_area_m2', 'number_of_ports', 'vb', 'port_length_m', 'fb',
+    #  'peak_port_velocity_ms' and 'peak_cone_excursion_mm'.
+    if frequencies is None:
+        frequencies = np.linspace(10, 120, num=221)
+    if port_areas is None:
+        port_areas = np.geomspace(5e-4, 5e-2, num=40)
+    if net_volumes is None:
+        net_volumes = np.geomspace(0.5, 2.0, num=25) * params['vb']
+    frequencies = np.asarray(frequencies, dtype=float)
+
+    # Candidate grid (one entry per combination)
+    grid = np.array(list(itertools.product(port_areas, port_counts, net_volumes)), dtype=float)
+    if grid.size == 0:
+        return []
+    port_area, number_of_ports, vb = grid.T
+
+    # Port length for each candidate (closed loop on the tuning formula, no trial and error)
+    port_length = tuning_solver.solve_port_length(
+        target_fb, dict(params, port_area_m2=port_area, number_of_ports=number_of_ports, vb=vb))
+    feasible = ~np.isnan(port_length)
+    if max_port_length is not None:
+        feasible &= port_length <= max_port_length
+
+    # Peak velocity/excursion of every feasible candidate, block by block
+    peak_velocity = np.full(len(grid), np.inf)
+    peak_excursion = np.full(len(grid), np.inf)
+    fb = np.full(len(grid), np.nan)
+    candidates = np.flatnonzero(feasible)
+    for start in range(0, len(candidates), block_size):
+        block = candidates[start:start + block_size]
+        design_params = dict(params,
+                             port_area_m2=port_area[block],
+                             number_of_ports=number_of_ports[block],
+                             vb=vb[block],
+                             port_length_m=port_length[block])
+        result = core.PreparedSystem(design_params).evaluate(frequencies)
+        peak_velocity[block] = np.nanmax(result.port_velocity_ms, axis=1)
+        peak_excursion[block] = np.nanmax(result.cone_excursion_mm, axis=1)
+        fb[block] = result.fb
+
+    feasible &= (peak_velocity <= max_port_velocity) & (peak_excursion <= max_cone_excursion)
+    keep = np.flatnonzero(feasible)
+    if len(keep) == 0:
+        return []
+
+    columns = {
+        'port_area_m2': port_area[keep],
+        'number_of_ports': number_of_ports[keep].astype(int),
+        'vb': vb[keep],
+        'port_length_m': port_length[keep],
+        'fb': fb[keep],
+        'peak_port_velocity_ms': peak_velocity[keep],
+        'peak_cone_excursion_mm': peak_excursion[keep],
+    }
+    front = pareto_front(np.column_stack([columns[name] for name in PARETO_OBJECTIVES]))
+    order = front[np.argsort(columns['vb'][front], kind='stable')]
+    return [{name: values[k].item() for name, values in columns.items()} for k in order]
+
+
+def pareto_front(objectives):
+    # Returns the row indices of the non-dominated rows of an (n x k) array (all minimized)
+    objectives = np.asarray(objectives, dtype=float)
+    order = np.lexsort(objectives.T[::-1])
+    front = []
+    for index in order:
+        point = objectives[index]
+        if front:
+            kept = objectives[front]
+            # Sorted order means a later row can never dominate an earlier one
+            if np.any(np.all(kept <= point, axis=1) & np.any(kept < point, axis=1)):
+                continue
+            if np.any(np.all(kept == point, axis=1)):
+                continue
+        front.append(index)
+    return np.array(front, dtype=int)
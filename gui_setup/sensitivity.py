@@ -0,0 +1,236 @@
+# Sensitivity of the headline results to every input parameter.
+#
+# Usage:
+#   python -m gui_setup.sensitivity
+#   python -m gui_setup.sensitivity designs.csv --start 10 --stop 200 --step 0.5 --json
+#
+# For each params key this gives the partial derivative, and the elasticity (% change of the
+# output per % change of the input), of fb, the peak cone excursion and the peak port velocity:
+#  - fb, and every frequency-independent term of PreparedSystem (ccab, lmap, the leak, ...), is
+#    differentiated by complex step: every key is stepped at once on the design axis of one
+#    vectorized PreparedSystem, exact to machine precision.
+#  - The model response uses complex numbers for the physics already, so it is differentiated
+#    analytically instead: the chain rule is carried through the closed-form impedances of
+#    PreparedSystem._evaluate_array (forward mode, every key at once), and the magnitudes use
+#    d|f| = Re(conj(f) * df) / |f|. A peak is differentiated at the nominal peak frequency
+#    (to first order, moving the peak doesn't change its height).
+# The same pass gives the derivative of every metric at every frequency (response_jacobian).
+import argparse
+import json
+import sys
+import numpy as np
+from . import core
+from . import test_data
+
+# Relative complex step size: it can be tiny since nothing is subtracted
+COMPLEX_STEP = 1e-20
+
+# Outputs reported by sensitivity_report
+OUTPUTS = ('fb', 'peak_cone_excursion_mm', 'peak_port_velocity_ms')
+
+
+def _steps(params, keys, relative):
+    # Step per key, relative to its value (or absolute for keys that are zero)
+    return np.array([relative * abs(params[key]) if params[key] else relative for key in keys])
+
+
+def _complex_steps(params, keys, steps):
+    # params with design k holding an imaginary step on keys[k] (and the nominal value elsewhere)
+    columns = dict(params)
+    for index, key in enumerate(keys):
+        values = np.full(len(keys), params[key], dtype=complex)
+        values[index] += 1j * steps[index]
+        columns[key] = values
+    return columns
+
+
+def fb_gradient(params, keys=None):
+    # Returns dict of key -> d(fb)/d(key) (Hz per SI unit of the key) for one design
+    # @param keys are the params keys to differentiate (defaults to all of them)
+    keys = list(params) if keys is None else list(keys)
+    steps = _steps(params, keys, COMPLEX_STEP)
+    fb = core.port_tuning_calculation_array(_complex_steps(params, keys, steps))
+    return dict(zip(keys, (np.imag(fb) / steps).tolist()))
+
+
+def _magnitude_derivative(value, derivative):
+    # d|f| from f and df
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(value != 0, (np.conj(value) * derivative).real / np.abs(value), np.abs(derivative))
+
+
+def response_jacobian(params, frequencies, keys=None):
+    # Differentiates the model response of one design at every frequency, for every key.
+    # @param keys are the params keys to differentiate (defaults to all of them)
+    # Returns: (nominal SweepResult, dict of metric -> array of shape (len(keys), len(frequencies)))
+    #  for the metrics 'zin' (complex), 'impedance_ohm', 'cone_excursion_mm' and 'port_velocity_ms'
+    keys = list(params) if keys is None else list(keys)
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    system = core.PreparedSystem(params)
+    nominal = system.evaluate(frequencies)
+
+    # Derivative of every prepared term with respect to each key, as (keys x 1) columns
+    steps = _steps(params, keys, COMPLEX_STEP)[:, np.newaxis]
+    stepped = core.PreparedSystem(_complex_steps(params, keys, steps.ravel()))
+
+    def d(name):
+        return np.imag(getattr(stepped, name)) / steps
+
+    w = 2.0 * np.pi * frequencies
+    s = 1j * w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Nominal terms (as in PreparedSystem._evaluate_array)
+        z_mech = system.rms + 1j * (w * system.mms - 1 / (w * system.cms))
+        zb = 1 / (system.leak_conductance + 1j * (w * system.ccab - 1 / (w * system.lmap)))
+        z_mech_total = z_mech + system.sd ** 2 * zb
+        zin, i, u, pd = nominal.zin, nominal.i, nominal.u, nominal.pd
+
+        # ... and their derivatives, rows for keys and columns for frequencies
+        dz_mech = d('rms') + 1j * (w * d('mms') + d('cms') / (w * system.cms ** 2))
+        dz_elec = d('re') + s * d('le')
+        dlmap = d('lmap')
+        # lmap is infinite without a port, and then so is its step; 1/lmap doesn't change
+        dadmittance = d('leak_conductance') + 1j * (w * d('ccab') + np.where(
+            np.isinf(system.lmap), 0, dlmap / (w * system.lmap ** 2)))
+        dzb = -zb ** 2 * dadmittance
+        dz_mech_total = dz_mech + 2 * system.sd * d('sd') * zb + system.sd ** 2 * dzb
+        dzin = dz_elec + (2 * system.bl * d('bl') - system.bl ** 2 * dz_mech_total / z_mech_total) / z_mech_total
+        di = (d('vg') - i * dzin) / zin
+        dpd = (di * system.bl * system.sd * zb + i * d('bl') * system.sd * zb + i * system.bl * d('sd') * zb
+               + i * system.bl * system.sd * dzb - pd * dz_mech_total) / z_mech_total
+        du = (d('bl') * i + system.bl * di - d('sd') * pd - system.sd * dpd - u * dz_mech) / z_mech
+
+        cone_excursion = _magnitude_derivative(u, du) * (np.sqrt(2) * 1000 / w)
+        if system.single_port_area_m2 > 0 and not np.isinf(system.lmap):
+            port_velocity = (_magnitude_derivative(pd, dpd) * (np.sqrt(2) / (w * system.lmap * system.single_port_area_m2))
+                             - nominal.port_velocity_ms * (dlmap / system.lmap + d('single_port_area_m2') / system.single_port_area_m2))
+        else:
+            port_velocity = np.zeros((len(keys), len(frequencies)))
+
+    jacobian = {
+        'zin': dzin,
+        'impedance_ohm': _magnitude_derivative(zin, dzin),
+        'cone_excursion_mm': cone_excursion,
+        'port_velocity_ms': port_velocity,
+    }
+    # Nothing moves at 0 Hz (see PreparedSystem.evaluate)
+    zero_mask = frequencies == 0
+    jacobian = {metric: np.where(zero_mask, 0, np.broadcast_to(values, (len(keys), len(frequencies))))
+                for metric, values in jacobian.items()}
+    return nominal, jacobian
+
+
+def sensitivity_report(params, frequencies, keys=None):
+    # Sensitivity of OUTPUTS to every key for one design, with the peaks taken over frequencies.
+    # Returns: dict with
+    #  'nominal': the output values, plus the frequencies of the two peaks
+    #   ('peak_cone_excursion_freq_hz', 'peak_port_velocity_freq_hz')
+    #  'parameters': one dict per key with 'parameter', 'value', 'derivative' and 'elasticity'
+    #   (each a dict over OUTPUTS; the elasticity is NaN where the input or output is zero)
+    keys = list(params) if keys is None else list(keys)
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    fb_derivatives = fb_gradient(params, keys)
+    nominal, jacobian = response_jacobian(params, frequencies, keys)
+
+    excursion_peak = int(np.argmax(nominal.cone_excursion_mm))
+    velocity_peak = int(np.argmax(nominal.port_velocity_ms))
+    values = {
+        'fb': float(nominal.fb),
+        'peak_cone_excursion_mm': float(nominal.cone_excursion_mm[excursion_peak]),
+        'peak_port_velocity_ms': float(nominal.port_velocity_ms[velocity_peak]),
+    }
+    derivatives = {
+        'fb': [fb_derivatives[key] for key in keys],
+        'peak_cone_excursion_mm': jacobian['cone_excursion_mm'][:, excursion_peak].tolist(),
+        'peak_port_velocity_ms': jacobian['port_velocity_ms'][:, velocity_peak].tolist(),
+    }
+
+    rows = []
+    for index, key in enumerate(keys):
+        value = float(params[key])
+        derivative = {output: derivatives[output][index] for output in OUTPUTS}
+        elasticity = {output: derivative[output] * value / values[output] if value and values[output] else float('nan')
+                      for output in OUTPUTS}
+        rows.append({'parameter': key, 'value': value, 'derivative': derivative, 'elasticity': elasticity})
+
+    nominal_values = dict(values,
+                          peak_cone_excursion_freq_hz=float(frequencies[excursion_peak]),
+                          peak_port_velocity_freq_hz=float(frequencies[velocity_peak]))
+    return {'nominal': nominal_values, 'parameters': rows}
+
+
+def ranked_parameters(report):
+    # Returns the report's parameter rows, most influential first (largest elasticity on any output)
+    def influence(row):
+        magnitudes = [abs(value) for value in row['elasticity'].values() if np.isfinite(value)]
+        return max(magnitudes, default=0.0)
+    return sorted(report['parameters'], key=influence, reverse=True)
+
+
+def format_report(report, name=None):
+    # Returns the report as a plain-text table of elasticities, most influential parameter first
+    nominal = report['nominal']
+    lines = []
+    if name is not None:
+        lines.append(f"Design {name}")
+    lines.append(f"fb {nominal['fb']:.2f} Hz, peak excursion {nominal['peak_cone_excursion_mm']:.2f} mm "
+                 f"at {nominal['peak_cone_excursion_freq_hz']:.1f} Hz, peak port velocity "
+                 f"{nominal['peak_port_velocity_ms']:.2f} m/s at {nominal['peak_port_velocity_freq_hz']:.1f} Hz")
+    lines.append("Elasticities (% change of the output per % change of the parameter):")
+    lines.append(f"{'parameter':<16} {'value':>12} {'fb':>9} {'excursion':>10} {'velocity':>10}")
+    for row in ranked_parameters(report):
+        elasticity = row['elasticity']
+        lines.append(f"{row['parameter']:<16} {row['value']:>12.5g} {elasticity['fb']:>9.3f} "
+                     f"{elasticity['peak_cone_excursion_mm']:>10.3f} {elasticity['peak_port_velocity_ms']:>10.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gui_setup.sensitivity",
+        description="Report how strongly fb, peak cone excursion and peak port velocity depend on every input.")
+    parser.add_argument("input", nargs="?",
+                        help="CSV or JSON-lines designs file ('-' for stdin); defaults to the built-in test design")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Defaults to the input file extension")
+    parser.add_argument("--start", type=float, default=10.0, help="Start frequency in Hz (default 10)")
+    parser.add_argument("--stop", type=float, default=120.0, help="Stop frequency in Hz (default 120)")
+    parser.add_argument("--step", type=float, default=0.5, help="Frequency step in Hz (default 0.5)")
+    parser.add_argument("--json", action="store_true", help="Write the full reports as JSON lines")
+    args = parser.parse_args(argv)
+
+    if args.step <= 0:
+        parser.error("--step must be positive")
+    if args.stop <= args.start:
+        parser.error("--stop must be above --start")
+
+    from .batch import _guess_format, design_params, read_designs
+
+    designs = [test_data.test_values]
+    if args.input:
+        file = sys.stdin if args.input == "-" else open(args.input, newline='')
+        try:
+            designs = list(read_designs(file, args.input_format or _guess_format(args.input, 'csv')))
+        except OSError as e:
+            parser.error(str(e))
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+    num_steps = int((args.stop - args.start) / args.step) + 1
+    frequencies = np.linspace(args.start, args.stop, num=num_steps)
+    for index, design in enumerate(designs):
+        name = (design.get('name') or index) if args.input else None
+        try:
+            report = sensitivity_report(design_params(design), frequencies)
+        except ValueError as e:
+            print(f"Design {name}: {e}", file=sys.stderr)
+            continue
+        if args.json:
+            print(json.dumps(dict(report, design=name)))
+        else:
+            print(format_report(report, name))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
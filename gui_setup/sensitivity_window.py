@@ -0,0 +1,80 @@
+# Window listing how strongly fb, peak cone excursion and peak port velocity depend on every input.
+import tkinter as tk
+from tkinter import ttk
+from gui_setup import sensitivity
+
+pad = 5
+
+# Result columns: (heading, width)
+_COLUMNS = (
+    ("Parameter", 140),
+    ("Value (SI)", 90),
+    ("fb", 80),
+    ("Excursion", 80),
+    ("Port Velocity", 90),
+)
+
+
+class SensitivityWindow(object):
+    # SensitivityWindow opens (or raises) a window showing a sensitivity.sensitivity_report.
+    # Every row is one input, most influential first; the numbers are elasticities
+    # (% change of the output per % change of the input).
+    # @param root is the main Tk window
+    def __init__(self, root):
+        self.root = root
+        self.window = None
+
+    def show(self, report):
+        # Shows report, opening the window or bringing it to the front
+        if self.window is None:
+            self._build()
+        else:
+            self.window.deiconify()
+            self.window.lift()
+        self._fill(report)
+
+    def _build(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Sensitivity")
+        self.window.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        self.summary = ttk.Label(self.window, text="", justify="left")
+        self.summary.grid(column=0, row=0, padx=pad, pady=pad, sticky="w")
+
+        result_frame = ttk.Frame(self.window)
+        result_frame.grid(column=0, row=1, padx=pad, pady=(0, pad), sticky="nsew")
+        columns = [str(index) for index in range(len(_COLUMNS))]
+        self.tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=len(_COLUMNS) * 3)
+        for column, (heading, width) in zip(columns, _COLUMNS):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w" if column == "0" else "e")
+        scrollbar = ttk.Scrollbar(result_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+    def _on_close(self):
+        self.window.destroy()
+        self.window = None
+
+    def _fill(self, report):
+        nominal = report['nominal']
+        self.summary.configure(text=(
+            f"fb {nominal['fb']:.2f} Hz, peak excursion {nominal['peak_cone_excursion_mm']:.2f} mm "
+            f"at {nominal['peak_cone_excursion_freq_hz']:.1f} Hz, peak port velocity "
+            f"{nominal['peak_port_velocity_ms']:.2f} m/s at {nominal['peak_port_velocity_freq_hz']:.1f} Hz\n"
+            "Elasticities: % change of each output per % change of the parameter"))
+
+        self.tree.delete(*self.tree.get_children())
+        for row in sensitivity.ranked_parameters(report):
+            elasticity = row['elasticity']
+            values = [row['parameter'], f"{row['value']:.5g}"]
+            values += [_format_elasticity(elasticity[output]) for output in sensitivity.OUTPUTS]
+            self.tree.insert("", "end", values=values)
+
+
+def _format_elasticity(value):
+    return f"{value:+.3f}" if value == value else ""  # NaN (zero input or output) is left blank
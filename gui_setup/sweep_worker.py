@@ -0,0 +1,94 @@
+# Runs long computations (sweeps) off the Tk thread so the window never freezes.
+import queue
+import threading
+
+
+class SweepWorker(object):
+    # SweepWorker runs one job at a time on a background thread and hands the result back to
+    # the Tk thread by polling a queue with after(). Submitting a new job supersedes the one in
+    # flight: its cancel event is set and, if it still finishes, its result is dropped.
+    # @param root is the Tk window used for after() polling
+    # @param poll_ms is how often (ms) the queue is checked while a job is running
+    # @param on_busy_change is an optional callback taking True/False when work starts/stops
+    def __init__(self, root, poll_ms=25, on_busy_change=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+        self._results = queue.Queue()
+        self._job_id = 0
+        self._cancel_event = None
+        self._callbacks = (None, None)
+        self._busy = False
+        self._polling = False
+
+    def submit(self, func, args=(), on_done=None, on_error=None):
+        # Runs func(*args, cancel_event=event) on a worker thread.
+        # on_done(result) or on_error(exception) is called on the Tk thread, unless a newer
+        # job was submitted in the meantime.
+        # Returns: the id of the new job
+        self._supersede()
+        job_id = self._job_id
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+        self._callbacks = (on_done, on_error)
+
+        thread = threading.Thread(target=self._run, args=(job_id, cancel_event, func, args), daemon=True)
+        thread.start()
+
+        self._set_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return job_id
+
+    def cancel(self):
+        # Cancels the job in flight (if any); its result will never be delivered
+        self._supersede()
+        self._set_busy(False)
+
+    def _supersede(self):
+        # Signals the job in flight to stop and moves on to a new job id
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        self._job_id += 1
+
+    def is_busy(self):
+        return self._busy
+
+    def _run(self, job_id, cancel_event, func, args):
+        # Worker thread body: never touches Tk, only the queue
+        try:
+            result = func(*args, cancel_event=cancel_event)
+            self._results.put((job_id, True, result))
+        except Exception as e:
+            self._results.put((job_id, False, e))
+
+    def _poll(self):
+        # Tk thread: deliver the latest job's result, drop stale ones
+        while True:
+            try:
+                job_id, succeeded, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self._job_id:
+                continue  # superseded or cancelled
+            on_done, on_error = self._callbacks
+            self._cancel_event = None
+            self._set_busy(False)
+            if succeeded:
+                if on_done:
+                    on_done(value)
+            elif on_error:
+                on_error(value)
+
+        if self._busy:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _set_busy(self, busy):
+        if busy != self._busy:
+            self._busy = busy
+            if self.on_busy_change:
+                self.on_busy_change(busy)
@@ -0,0 +1,87 @@
+# Monte Carlo tolerance analysis of the driver parameters.
+#
+# Production drivers spread around their nominal Thiele/Small values. This draws thousands of
+# random parameter sets (Cms, Mms, Bl and Re, each uniform within +/- its tolerance), runs them
+# all through the model as one (samples x frequencies) broadcast, and reduces every metric to
+# percentile bands per frequency:
+#
+#   bands = run_tolerance_analysis(params, np.linspace(10, 200, 1000))
+#   low, median, high = bands['cone_excursion_mm']
+#
+# The frequencies are processed a block at a time with every sample in each block, so the
+# percentiles are exact while memory stays capped at about chunk_values points per pass.
+import numpy as np
+from . import core
+
+# Default spread of each driver parameter (fraction of the nominal value, +/-)
+DEFAULT_TOLERANCES = {'cms': 0.15, 'mms': 0.10, 'bl': 0.10, 're': 0.10}
+DEFAULT_NUM_SAMPLES = 10000
+# Lower band, median and upper band
+DEFAULT_PERCENTILES = (5, 50, 95)
+# Points (samples x frequencies) evaluated per pass
+DEFAULT_CHUNK_VALUES = 1 << 17
+
+# Metrics reduced to bands, by result key, with the graph type they belong to
+METRICS = {
+    'impedance_ohm': "Impedance",
+    'cone_excursion_mm': "Cone Excursion (mm)",
+    'port_velocity_ms': "Port Velocity (m/s)",
+    'group_delay_ms': "Group Delay (ms)",
+}
+
+
+def sample_parameters(params, tolerances=None, num_samples=DEFAULT_NUM_SAMPLES, seed=None):
+    # Returns params with every toleranced key replaced by num_samples random values, uniform
+    # within nominal * (1 +/- tolerance). The other keys stay scalar and broadcast.
+    # @param tolerances maps params keys to fractions (defaults to DEFAULT_TOLERANCES)
+    # @param seed makes the draw repeatable
+    rng = np.random.default_rng(seed)
+    samples = dict(params)
+    for key, tolerance in (DEFAULT_TOLERANCES if tolerances is None else tolerances).items():
+        if tolerance < 0:
+            raise ValueError(f"Tolerance for '{key}' must not be negative")
+        samples[key] = params[key] * rng.uniform(1 - tolerance, 1 + tolerance, size=num_samples)
+    return samples
+
+
+def run_tolerance_analysis(params, frequencies, tolerances=None, num_samples=DEFAULT_NUM_SAMPLES,
+                           percentiles=DEFAULT_PERCENTILES, seed=None, chunk_values=DEFAULT_CHUNK_VALUES,
+                           cancel_event=None):
+    # Runs num_samples toleranced copies of one design over frequencies.
+    # @param params is the nominal (single design) params dict in SI units
+    # @param cancel_event is an optional threading.Event checked between blocks (raises SweepCancelled)
+    # Returns: dict with 'frequency', 'num_samples', 'percentiles' and, for every key of METRICS,
+    #  an array of shape (len(percentiles), len(frequencies)) holding the percentile curves
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    if num_samples < 1:
+        raise ValueError("num_samples must be at least 1")
+    system = core.PreparedSystem(sample_parameters(params, tolerances, num_samples, seed))
+    block = max(int(chunk_values) // num_samples, 1)
+
+    bands = {key: np.empty((len(percentiles), len(frequencies))) for key in METRICS}
+    for start in range(0, len(frequencies), block):
+        if cancel_event is not None and cancel_event.is_set():
+            raise core.SweepCancelled()
+        stop = start + block
+        result = system.evaluate(frequencies[start:stop])
+        values = {
+            'impedance_ohm': result.magnitude(),
+            'cone_excursion_mm': result.cone_excursion_mm,
+            'port_velocity_ms': result.port_velocity_ms,
+            'group_delay_ms': result.group_delay_ms,
+        }
+        for key, samples in values.items():
+            bands[key][:, start:stop] = _percentiles(samples, percentiles)
+
+    return dict(bands, frequency=frequencies, num_samples=num_samples, percentiles=tuple(percentiles))
+
+
+def _percentiles(samples, percentiles):
+    # Same as np.percentile(samples, percentiles, axis=0) with linear interpolation, but from one
+    # full sort: NumPy's sort is vectorized and several times faster here than its partition
+    ordered = np.sort(samples, axis=0)
+    positions = np.asarray(percentiles, dtype=float) / 100 * (len(ordered) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(ordered) - 1)
+    fraction = (positions - lower)[:, np.newaxis]
+    return ordered[lower] * (1 - fraction) + ordered[upper] * fraction
@@ -0,0 +1,87 @@
+# Inverse of core.port_tuning_calculation: finds the port length, port area or
+# net volume that gives a target tuning frequency (fb) with the averaged JL/DIY formula.
+#
+# Every solver takes the usual params dict (SI units, as returned by gather_all_inputs())
+# and a target fb in Hz. Targets and params values may be NumPy arrays, in which case
+# everything is solved at once and the result has the broadcast shape. Targets that no
+# physical geometry can reach come back as NaN.
+import numpy as np
+from . import core
+
+# Bisection steps for the bracketing solvers (enough to reach full double precision)
+_BISECTION_STEPS = 64
+# Give up widening a bracket after this many doublings
+_MAX_BRACKET_EXPANSIONS = 200
+
+
+def solve_net_volume(target_fb, params):
+    # Returns the net box volume (m^3) that tunes the port to target_fb.
+    # Both the JL and DIY formulas scale with 1/sqrt(volume), so this has a closed form:
+    # vb = vb_ref * (fb_ref / target_fb)^2
+    target_fb = np.asarray(target_fb, dtype=float)
+    reference_volume = 1.0
+    fb_ref = core.port_tuning_calculation_array(dict(params, vb=reference_volume))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume = reference_volume * (fb_ref / target_fb) ** 2
+    return _finish(np.where((target_fb > 0) & (fb_ref > 0), volume, np.nan))
+
+
+def solve_port_length(target_fb, params):
+    # Returns the length (m) of each port that tunes the box to target_fb.
+    # fb falls as the port gets longer, so the answer is bracketed between 0 and a length
+    # long enough to tune below the target. Targets above the zero-length tuning are unreachable.
+    def tuning(length):
+        return core.port_tuning_calculation_array(dict(params, port_length_m=length))
+
+    return _solve_monotonic(tuning, target_fb, params, lower=0.0, upper=1.0, increasing=False)
+
+
+def solve_port_area(target_fb, params):
+    # Returns the cross sectional area (m^2) of each port that tunes the box to target_fb.
+    # fb rises with port area, so the answer is bracketed between ~0 and an area large enough
+    # to tune above the target.
+    def tuning(area):
+        return core.port_tuning_calculation_array(dict(params, port_area_m2=area))
+
+    return _solve_monotonic(tuning, target_fb, params, lower=1e-12, upper=0.01, increasing=True)
+
+
+def _solve_monotonic(tuning, target_fb, params, lower, upper, increasing):
+    # Vectorized bracketing solve of tuning(x) == target_fb for a monotonic tuning function.
+    # The bracket starts at [lower, upper] and upper is doubled until it contains every target.
+    shape = np.broadcast_shapes(np.shape(target_fb), *(np.shape(value) for value in params.values()))
+    target_fb = np.broadcast_to(np.asarray(target_fb, dtype=float), shape)
+    lo = np.full(shape, lower)
+    hi = np.full(shape, upper)
+
+    # Targets outside what the geometry can reach at the fixed end of the bracket
+    fb_lower = tuning(lo)
+    if increasing:
+        reachable = (target_fb > fb_lower) & (target_fb > 0)
+    else:
+        reachable = (target_fb <= fb_lower) & (target_fb > 0)
+
+    # Widen the bracket until it contains every reachable target
+    for _ in range(_MAX_BRACKET_EXPANSIONS):
+        fb_upper = tuning(hi)
+        short = reachable & ((fb_upper < target_fb) if increasing else (fb_upper > target_fb))
+        if not short.any():
+            break
+        hi = np.where(short, hi * 2, hi)
+    else:
+        reachable = reachable & ~short
+
+    # Bisect; fb is monotonic so the bracket always keeps the root
+    for _ in range(_BISECTION_STEPS):
+        mid = 0.5 * (lo + hi)
+        fb_mid = tuning(mid)
+        below = (fb_mid < target_fb) if increasing else (fb_mid > target_fb)
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+
+    return _finish(np.where(reachable, 0.5 * (lo + hi), np.nan))
+
+
+def _finish(values):
+    # Returns a plain float for scalar input, otherwise the array
+    return float(values) if np.ndim(values) == 0 else values
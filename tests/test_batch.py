@@ -0,0 +1,18 @@
+import io
+import json
+import numpy as np
+from gui_setup import batch, test_data
+
+
+def test_bad_jsonl_lines_become_error_rows():
+    good = json.dumps(dict(test_data.test_values, name="good"))
+    text = "\n".join([good, "{not json", "[1, 2]", good]) + "\n"
+    designs = batch.read_designs(io.StringIO(text), 'jsonl')
+    rows = list(batch.evaluate_designs(designs, np.linspace(10, 100, 50)))
+
+    assert len(rows) == 4
+    assert rows[1]['design'] == 1 and rows[1]['error'].startswith("Line 2: invalid JSON")
+    assert rows[2]['design'] == 2 and rows[2]['error'].startswith("Line 3: expected a JSON object")
+    for row in (rows[0], rows[3]):
+        assert row['design'] == "good" and 'error' not in row
+        assert np.isfinite(row['fb_hz'])
@@ -0,0 +1,49 @@
+import numpy as np
+from gui_setup import core, inputs, test_data
+
+PARAMS = inputs.design_to_params(test_data.test_values)
+
+
+def test_zero_cms_matches_baseline_model():
+    params = dict(PARAMS, cms=0.0)
+    expected = core.run_full_analysis_at_frequency(50.0, params)
+    point = core.PreparedSystem(params).evaluate(50.0)
+    sweep = core.PreparedSystem(params).evaluate([50.0])
+
+    assert np.isclose(point['zin'], expected['zin'])
+    assert np.isclose(sweep.zin[0], expected['zin'])
+    for result in (point, {key: getattr(sweep, key)[0] for key in ('u', 'pd', 'cone_excursion_mm')}):
+        assert result['u'] == 0 and result['pd'] == 0 and result['cone_excursion_mm'] == 0
+
+
+def test_zero_volume_leaves_only_the_voice_coil():
+    params = dict(PARAMS, vb=0.0)
+    z_elec = params['re'] + 2j * np.pi * 50.0 * params['le']
+    point = core.PreparedSystem(params).evaluate(50.0)
+    sweep = core.PreparedSystem(params).evaluate([50.0])
+
+    assert np.isclose(point['zin'], z_elec) and np.isclose(sweep.zin[0], z_elec)
+    assert point['cone_excursion_mm'] == 0 and sweep.cone_excursion_mm[0] == 0
+    assert np.all(np.isfinite(sweep.group_delay_ms))
+
+
+def test_zero_inputs_only_affect_their_own_design():
+    frequencies = np.linspace(10, 200, 20)
+    columns = dict(PARAMS, cms=np.array([PARAMS['cms'], 0.0]), vb=np.array([0.0, PARAMS['vb']]))
+    result = core.PreparedSystem(columns).evaluate(frequencies)
+    no_box = core.PreparedSystem(dict(PARAMS, vb=0.0)).evaluate(frequencies)
+    no_compliance = core.PreparedSystem(dict(PARAMS, cms=0.0)).evaluate(frequencies)
+
+    assert np.all(np.isfinite(result.zin))
+    for design, expected in enumerate((no_box, no_compliance)):
+        for name in ('zin', 'pd', 'cone_excursion_mm', 'port_velocity_ms'):
+            assert np.allclose(getattr(result, name)[design], getattr(expected, name))
+
+
+def test_frequency_range_is_a_view_for_several_designs():
+    result = core.PreparedSystem(core.stack_designs([PARAMS, dict(PARAMS, cms=PARAMS['cms'] * 1.1)])).evaluate(
+        np.linspace(10, 200, 400))
+    window = result.frequency_range(20, 50)
+
+    for name in core.SweepResult.ARRAY_FIELDS:
+        assert np.shares_memory(getattr(window, name), getattr(result, name))